@@ -724,7 +724,7 @@ if __name__ == "__main__":
             print(f"Using geographic data: {geo_data_file}")
             # Log some stats from the geo data
             try:
-                with open(geo_data_file, 'r') as f:
+                with open(geo_data_file, 'r', encoding='utf-8') as f:
                     geo_data = json.load(f)
                 logger.info(f"  - Buildings: {len(geo_data.get('buildings', []))}")
                 logger.info(f"  - Elevations: {len(geo_data.get('elevations', {}))}")
@@ -1066,11 +1066,9 @@ if __name__ == "__main__":
         ihdr = struct.pack("!2I5B", width, height, 8, 2, 0, 0, 0)
         png_data += png_pack(b'IHDR', ihdr)
         
-        raw_data = b''
-        for y in range(height):
-            raw_data += b'\x00'
-            for x in range(width):
-                raw_data += struct.pack('!3B', *color)
+        # Each scanline is a filter type byte followed by the pixels
+        row = b'\x00' + struct.pack('!3B', *color) * width
+        raw_data = row * height
         
         compressed_data = zlib.compress(raw_data, 9)
         png_data += png_pack(b'IDAT', compressed_data)
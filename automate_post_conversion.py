@@ -78,11 +78,8 @@ class PostConversionAutomator:
             png_data += png_pack(b'IHDR', ihdr)
             
             # IDAT chunk - create pixel data
-            raw_data = b''
-            for y in range(height):
-                raw_data += b'\x00'  # Filter type
-                for x in range(width):
-                    raw_data += struct.pack('!3B', *color)
+            row = b'\x00' + struct.pack('!3B', *color) * width  # Filter type, then pixels
+            raw_data = row * height
             
             compressed_data = zlib.compress(raw_data, 9)
             png_data += png_pack(b'IDAT', compressed_data)
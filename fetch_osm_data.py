@@ -14,6 +14,28 @@ import urllib.request
 import urllib.parse
 
 
+def _parse_response(data: bytes) -> dict:
+    """Parse an Overpass JSON response, using orjson (optional dependency) when available"""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(data)
+    return orjson.loads(data)
+
+
+def _save_osm_data(osm_data: dict, output_file: str) -> None:
+    """Save OSM data as indented UTF-8 JSON, using orjson when available"""
+    try:
+        import orjson
+    except ImportError:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(osm_data, f, indent=2, ensure_ascii=False)
+        return
+    
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(osm_data, option=orjson.OPT_INDENT_2))
+
+
 def fetch_osm_data(bbox: str, output_file: str = "osm_data.json"):
     """
     Fetch OSM data from Overpass API
@@ -76,7 +98,7 @@ def fetch_osm_data(bbox: str, output_file: str = "osm_data.json"):
         
         # Make request
         with urllib.request.urlopen(overpass_url, data=data, timeout=120) as response:
-            osm_data = json.loads(response.read().decode('utf-8'))
+            osm_data = _parse_response(response.read())
         
         # Count elements
         elements = osm_data.get('elements', [])
@@ -109,8 +131,7 @@ def fetch_osm_data(bbox: str, output_file: str = "osm_data.json"):
         print(f"  - Buildings with height data: {buildings_with_height}")
         
         # Save to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(osm_data, f, indent=2, ensure_ascii=False)
+        _save_osm_data(osm_data, output_file)
         
         print(f"\n✓ Data saved to {output_file}")
         print(f"\nNext step:")
@@ -161,13 +182,12 @@ def fetch_by_relation_id(relation_id: int, output_file: str = "osm_data.json"):
         data = urllib.parse.urlencode({'data': overpass_query}).encode('utf-8')
         
         with urllib.request.urlopen(overpass_url, data=data, timeout=120) as response:
-            osm_data = json.loads(response.read().decode('utf-8'))
+            osm_data = _parse_response(response.read())
         
         elements = osm_data.get('elements', [])
         print(f"\nFetched {len(elements)} elements")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(osm_data, f, indent=2, ensure_ascii=False)
+        _save_osm_data(osm_data, output_file)
         
         print(f"✓ Data saved to {output_file}")
         print(f"\nNext step:")
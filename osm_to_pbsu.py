@@ -7,12 +7,19 @@ This tool extracts bus routes, bus stops, and road networks from OpenStreetMap
 and generates the necessary files for Proton Bus Simulator maps.
 """
 
+import io
+import functools
+import itertools
 import json
 import math
 import os
+import re
+import string
 import sys
-from typing import Dict, List, Tuple, Optional
-import argparse
+from array import array
+from collections.abc import Mapping, Sequence
+from types import SimpleNamespace
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 import logging
 
 # Configure logging
@@ -26,93 +33,882 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Separator line around the conversion banner in the log
+_SEP = "=" * 60
+
+# Highway types collected as road segments
+_ROAD_TYPES = frozenset({'primary', 'secondary', 'tertiary', 'residential', 'trunk'})
+
+
+def _is_collected_way(tags: Optional[Dict]) -> bool:
+    """Whether a way with these tags is kept as a road segment or building"""
+    return bool(tags) and (tags.get('highway') in _ROAD_TYPES or bool(tags.get('building')))
+
+
+# Unit letters dropped from height tags such as "15 m" (float() ignores the spaces)
+_HEIGHT_UNIT = re.compile(r'[mM]')
+
+# Meters per floor for heights derived from building:levels
+_LEVEL_HEIGHT = 3.5
+
+# Height in meters for building types missing from _DEFAULT_BUILDING_HEIGHTS
+_DEFAULT_HEIGHT = 10.0
+
+# Building height in meters by building type, when the tags give no height
+_DEFAULT_BUILDING_HEIGHTS = {
+    'house': 7.0,
+    'residential': 10.5,  # 3 floors
+    'apartments': 21.0,   # 6 floors
+    'commercial': 14.0,   # 4 floors
+    'retail': 7.0,
+    'industrial': 10.0,
+    'warehouse': 8.0,
+    'office': 35.0,       # 10 floors
+    'hotel': 28.0,        # 8 floors
+    'school': 10.5,
+    'university': 14.0,
+    'hospital': 21.0,
+    'church': 15.0,
+    'cathedral': 25.0,
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _building_height(height: Optional[str], building_height: Optional[str],
+                     levels: Optional[str], building_type: str) -> float:
+    """Building height in meters from its height, building:height, building:levels and building tags"""
+    # Direct height in meters
+    if height is not None:
+        try:
+            return float(_HEIGHT_UNIT.sub('', height))
+        except (ValueError, TypeError):
+            pass
+    
+    # Building height tag
+    if building_height is not None:
+        try:
+            return float(_HEIGHT_UNIT.sub('', building_height))
+        except (ValueError, TypeError):
+            pass
+    
+    # Number of levels
+    if levels is not None:
+        try:
+            return float(levels) * _LEVEL_HEIGHT
+        except (ValueError, TypeError):
+            pass
+    
+    # Default heights based on building type
+    return _DEFAULT_BUILDING_HEIGHTS.get(building_type, _DEFAULT_HEIGHT)
+
+
+# Characters dropped from internal names (anything but letters, digits and '_')
+_SANITIZE = re.compile(r'\W')
+
+# ASCII fast path: spaces and dashes become '_', other non-word characters are dropped
+_ASCII_WORD_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+_SANITIZE_TABLE = {i: None for i in range(128) if chr(i) not in _ASCII_WORD_CHARS}
+_SANITIZE_TABLE.update({ord(' '): '_', ord('-'): '_'})
+
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize_name(name: str) -> str:
+    """
+    Clean a stop name for internal use (no spaces or special chars)
+    
+    Cached because stop names repeat, e.g. one stop per direction of travel.
+    """
+    try:
+        name.encode('ascii')  # str.isascii() needs Python 3.7
+    except UnicodeEncodeError:
+        # Non-ASCII names keep their Unicode letters and digits
+        return _SANITIZE.sub('', name.replace(' ', '_').replace('-', '_'))
+    return name.translate(_SANITIZE_TABLE)
+
+
+def _internal_name(stop: Dict) -> str:
+    """
+    Return the stop's internal name, derived from its current name
+    
+    _sanitize_name is cached, so repeated calls cost a dict lookup and a
+    renamed stop always gets the matching internal name.
+    """
+    return _sanitize_name(stop['name'])
+
+
+# OSM files smaller than this are loaded whole instead of streamed
+_STREAM_MIN_SIZE = 50 << 20
+
+# Bump when the parsed bus stop/way/building structures change, to ignore old caches
+_PARSE_CACHE_VERSION = 1
+
+
+def _default_cache_dir() -> str:
+    """Per-user cache directory for parsed OSM data ($XDG_CACHE_HOME or ~/.cache)"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'osm_to_pbsu')
+
+
+# Buffer size for generated files, so most are flushed in a single write
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Threads used to write the per-stop configuration files; writes are IO-bound
+# and release the GIL, so this scales past the core count
+_WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Bus stop files rendered and written per thread pool task
+_WRITE_CHUNK_SIZE = 64
+
+
+# Main .map.txt file: map name, route name
+_MAP_TMPL = (
+    "[map]\n"
+    "baseDir=%s\n"
+    "modelsDir=%s\n"
+    "textures=textures\n"
+    "mapModVersion=2\n"
+    "preview=preview.png\n"
+)
+
+# Per-stop configuration file: stop name, internal name
+_BUSSTOP_TMPL = (
+    "[busstop]\n"
+    "name=%s\n"
+    "side=right\n"  # Default to right side
+    "radius=1\n"
+    "paxAmount=5\n"  # Default 5 passengers
+    "\n"
+    "[from_3d]\n"
+    "readFrom3D=1\n"
+    "prefix=%s\n"
+    "rotY=0\n"
+)
+
+# Constant segments around the two %s fields of _BUSSTOP_TMPL, encoded once and
+# shared by every bus stop file. Newlines follow os.linesep like text-mode writes.
+_BUSSTOP_PARTS = tuple(
+    part.replace('\n', os.linesep).encode('utf-8') for part in _BUSSTOP_TMPL.split('%s')
+)
+
+# One entrypoints.txt block per bus stop: index, internal name, x, y, z, rotY
+_ENTRYPOINT_TMPL = (
+    "[entrypoint_%d]\n"
+    "name=%s\n"
+    "posX=%.6f\n"
+    "posY=%.6f\n"
+    "posZ=%.6f\n"
+    "rotX=0\n"
+    "rotY=%g\n"
+    "rotZ=0\n"
+)
+
+# README.md header, filled with str.format; the bus stop lines follow it
+_README_TMPL = """# PBSU Route: {map_name} - {route_name}
+
+## Generated from OpenStreetMap Data
+
+This route was automatically generated from OpenStreetMap data using osm_to_pbsu.py
+
+### Statistics:
+- Bus stops: {stop_count}
+- Road segments: {road_count}
+- Buildings: {building_count} ({buildings_with_height} with height data)
+- Elevation points: {elevation_count}
+- Origin coordinates: {origin_lat}, {origin_lon}
+
+### Next Steps:
+
+1. **Create 3D Models in Blender 2.8 or higher:**
+   - Model the road network and buildings
+   - Place bus stop objects at the coordinates specified in entrypoints.txt
+   - Each bus stop needs:
+     - A trigger object named `{{stopname}}_trigger`
+     - Passenger spawn points named `{{stopname}}.000`, `{{stopname}}.001`, etc.
+   - Export to .3ds format and place in tiles/{route_name}/
+
+2. **Add Textures:**
+   - Place texture files in {map_name}/textures/
+
+3. **Configure Destinations:**
+   - Create destination folders in {map_name}/dest/
+   - Add destination display images
+
+4. **Create Preview Image:**
+   - Add preview.png (640x360px recommended) in {map_name}/
+
+5. **Test in Proton Bus Simulator:**
+   - Copy the {map_name}/ folder to your PBSU mods/maps/ directory
+   - Copy {map_name}.map.txt to mods/maps/
+   - Launch PBSU and select the map
+
+### Bus Stops:
+"""
+
+# One README line per bus stop: index, name, x, y, z
+_README_STOP_TMPL = "\n%d. %s - Position: (%.2f, %.2f, %.2f)"
+
+
+class _WayNodes(Sequence):
+    """
+    Packed way geometry: latitudes and longitudes in two array('d') columns
+    
+    Reads like the list of {'lat': ..., 'lon': ...} dicts it replaces
+    (indexing, slicing, iteration, len) while storing 16 bytes per vertex.
+    Hot loops should use the lats/lons columns directly.
+    """
+    __slots__ = ('lats', 'lons')
+    
+    def __init__(self, lats: array, lons: array):
+        self.lats = lats
+        self.lons = lons
+    
+    def __len__(self) -> int:
+        return len(self.lats)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [{'lat': lat, 'lon': lon}
+                    for lat, lon in zip(self.lats[index], self.lons[index])]
+        return {'lat': self.lats[index], 'lon': self.lons[index]}
+    
+    def __iter__(self):
+        for lat, lon in zip(self.lats, self.lons):
+            yield {'lat': lat, 'lon': lon}
+
+
+class ElevationSet(Mapping):
+    """
+    Elevations for distinct locations: lat, lon and z in three array('d') columns
+    
+    Reads like the {(lat, lon): elevation} dict it replaces (lookup,
+    iteration, len, items) while storing 24 bytes per location.
+    Bulk consumers should use the lats/lons/z columns directly.
+    """
+    __slots__ = ('lats', 'lons', 'z', '_index')
+    
+    def __init__(self, lats: array, lons: array, z: array):
+        self.lats = lats
+        self.lons = lons
+        self.z = z
+        self._index = None
+    
+    @classmethod
+    def from_locations(cls, locations: List[Tuple[float, float]], z: Iterable[float]) -> 'ElevationSet':
+        """Build from distinct (lat, lon) tuples and their elevations, in the same order"""
+        return cls(array('d', [lat for lat, _ in locations]),
+                   array('d', [lon for _, lon in locations]),
+                   array('d', z))
+    
+    def __len__(self) -> int:
+        return len(self.z)
+    
+    def __getitem__(self, location: Tuple[float, float]) -> float:
+        # Lookups are rare; build the location -> row index on first use
+        if self._index is None:
+            self._index = {loc: row for row, loc in enumerate(zip(self.lats, self.lons))}
+        return self.z[self._index[location]]
+    
+    def __iter__(self):
+        return zip(self.lats, self.lons)
+
+
+class _OriginProjection:
+    """
+    Projection from (lat, lon) to Unity coordinates for one origin
+    
+    The origin terms are computed once, in __init__. columns() holds the
+    formula; calling the projection converts a single point with it.
+    """
+    __slots__ = ('origin_lat_rad', 'origin_lon_rad')
+    
+    EARTH_RADIUS = 6371000
+    
+    def __init__(self, origin_lat: float, origin_lon: float):
+        self.origin_lat_rad = math.radians(origin_lat)
+        self.origin_lon_rad = math.radians(origin_lon)
+    
+    def columns(self, lats: Sequence[float], lons: Sequence[float]) -> Tuple[List[float], List[float]]:
+        """Project parallel lat/lon sequences to (xs, zs) lists, one list comprehension per step"""
+        earth_radius = self.EARTH_RADIUS
+        earth_diameter = 2 * earth_radius
+        origin_lat_rad = self.origin_lat_rad
+        origin_lon_rad = self.origin_lon_rad
+        radians = math.radians
+        cos = math.cos
+        sin = math.sin
+        atan2 = math.atan2
+        sqrt = math.sqrt
+        
+        lat_rads = list(map(radians, lats))
+        # Haversine distance along the parallel (east is positive)
+        halves = [cos(lat_rad) * sin((radians(lon) - origin_lon_rad) / 2)
+                  for lat_rad, lon in zip(lat_rads, lons)]
+        xs = [earth_diameter * atan2(a, sqrt(1 - a * a)) for a in halves]  # East-West
+        zs = [(lat_rad - origin_lat_rad) * earth_radius for lat_rad in lat_rads]  # North-South
+        return xs, zs
+    
+    def __call__(self, lat: float, lon: float) -> Tuple[float, float, float]:
+        xs, zs = self.columns((lat,), (lon,))
+        return (xs[0], 0.0, zs[0])
+
+
+@functools.lru_cache(maxsize=4)
+def _origin_projector(origin_lat: float, origin_lon: float) -> _OriginProjection:
+    """Projection for one origin, cached so repeated scalar calls reuse it"""
+    return _OriginProjection(origin_lat, origin_lon)
+
+
+def _write_text_file(path: str, *parts: str) -> None:
+    """
+    Write a generated UTF-8 text file, given as one or more parts
+    
+    Each part is encoded once and the file is written with _write_byte_parts,
+    bypassing the text I/O layer. Newlines follow os.linesep like text mode.
+    """
+    if os.linesep != '\n':
+        parts = [part.replace('\n', os.linesep) for part in parts]
+    _write_byte_parts(path, [part.encode('utf-8') for part in parts])
+
+
+def _load_json_file(path: str):
+    """
+    Load a whole JSON file, using orjson (optional dependency) when available
+    
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers see the
+    same exception type with either parser.
+    """
+    try:
+        import orjson
+    except ImportError:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _finite_or_none(value):
+    """Copy of a JSON-ready value with NaN and infinite floats replaced by None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(item) for item in value]
+    return value
+
+
+def _write_json_file(path: str, data) -> None:
+    """
+    Write data as indented UTF-8 JSON, using orjson (optional dependency) when available
+    
+    Both paths write the same document: raw UTF-8 rather than \\u escapes,
+    '\\n' line breaks, and null for NaN or infinite floats (orjson's
+    behaviour; bare NaN is not valid JSON). Without orjson the document is
+    encoded with one json.dumps call and a single write.
+    """
+    try:
+        import orjson
+    except ImportError:
+        try:
+            text = json.dumps(data, indent=2, ensure_ascii=False, allow_nan=False)
+        except ValueError:
+            # Only documents holding NaN/inf pay for the copy
+            text = json.dumps(_finite_or_none(data), indent=2, ensure_ascii=False)
+        _write_byte_parts(path, [text.encode('utf-8')])
+        return
+    
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def _write_byte_parts(path: str, parts: Sequence) -> None:
+    """
+    Write byte chunks to a file, with a single writev call where available
+    
+    Lets callers pass shared constant segments instead of building a new
+    joined buffer per file.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        written = os.writev(fd, parts) if hasattr(os, 'writev') else 0
+        if written < sum(map(len, parts)):
+            # No writev, or a short write: finish with plain writes
+            remaining = memoryview(b''.join(parts))[written:]
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+    finally:
+        os.close(fd)
+
+
+def _iter_osm_elements(osm_file: str) -> Iterator[Dict]:
+    """
+    Yield the elements of an OSM JSON file
+    
+    Uses ijson (optional dependency) to stream elements one at a time so large
+    Overpass exports are never fully loaded in memory. Falls back to loading
+    the whole file with _load_json_file.
+    """
+    try:
+        import ijson
+    except ImportError:
+        logger.debug("ijson not installed, loading the whole OSM file")
+        osm_data = _load_json_file(osm_file)
+        yield from osm_data.get('elements', [])
+        return
+    
+    logger.debug("Streaming OSM file with ijson")
+    with open(osm_file, 'rb') as f:
+        try:
+            yield from ijson.items(f, 'elements.item', use_float=True)
+        except ijson.JSONError as e:
+            # Surface the same error type as the json.load path
+            raise json.JSONDecodeError(str(e), '', 0) from e
+
+
+def _read_xyz_points(path: str) -> Tuple[Sequence, Sequence, Sequence]:
+    """
+    Read the x, y, z columns of an XYZ ASCII point file
+    
+    Uses numpy's C parser (optional dependency) when every line holds at
+    least three numbers. Otherwise parses line by line, skipping lines that
+    are not points.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        pass
+    else:
+        try:
+            points = np.loadtxt(path, usecols=(0, 1, 2)).reshape(-1, 3)
+        except ValueError:
+            logger.debug("XYZ file has non-point lines, parsing line by line")
+        else:
+            return points[:, 0], points[:, 1], points[:, 2]
+    
+    xs = array('d')
+    ys = array('d')
+    zs = array('d')
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3:
+                try:
+                    x, y, z = float(parts[0]), float(parts[1]), float(parts[2])
+                except ValueError:
+                    continue
+                xs.append(x)
+                ys.append(y)
+                zs.append(z)
+    return xs, ys, zs
+
+
+# Average LiDAR points per cell of the fallback grid index
+_GRID_POINTS_PER_CELL = 4
+
+# Most LiDAR points the pure-Python grid fallback indexes; larger clouds are
+# subsampled with an even stride so the whole tile stays covered
+_GRID_MAX_POINTS = 100000
+
+
+def _grid_nearest(xs: Sequence, ys: Sequence, zs: Sequence,
+                  locations: List[Tuple[float, float]]) -> List[float]:
+    """
+    Nearest-point elevations using a uniform grid, for when scipy is missing
+    
+    Points are bucketed into square cells; each location scans rings of cells
+    around its own until no unscanned cell can hold a closer point. Distances
+    are compared squared, and ties go to the earliest point like a linear scan.
+    """
+    min_x, max_x = min(xs), max(xs)
+    min_y, max_y = min(ys), max(ys)
+    width = max_x - min_x
+    height = max_y - min_y
+    # About _GRID_POINTS_PER_CELL points per cell; the second term keeps the
+    # long side of an elongated (or flat) cloud to at most n / k cells
+    n = len(zs)
+    cell = max(math.sqrt(width * height * _GRID_POINTS_PER_CELL / n),
+               max(width, height) * _GRID_POINTS_PER_CELL / n) or 1.0
+    nx = int(width / cell) + 1
+    ny = int(height / cell) + 1
+    
+    buckets = {}
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        buckets.setdefault((int((x - min_x) / cell), int((y - min_y) / cell)), []).append(i)
+    
+    def rect_d2(x_lo: float, x_hi: float, y_lo: float, y_hi: float, x: float, y: float) -> float:
+        """Squared distance from (x, y) to a rectangle"""
+        dx = max(x_lo - x, 0.0, x - x_hi)
+        dy = max(y_lo - y, 0.0, y - y_hi)
+        return dx * dx + dy * dy
+    
+    nearest = []
+    for lat, lon in locations:
+        # Locations outside the cloud start from the closest edge cell
+        cx = min(max(math.floor((lon - min_x) / cell), 0), nx - 1)
+        cy = min(max(math.floor((lat - min_y) / cell), 0), ny - 1)
+        best_d = math.inf
+        best_i = -1
+        r = 0
+        while True:
+            i0, i1 = cx - r, cx + r
+            j0, j1 = cy - r, cy + r
+            # Ring cells clipped to the grid
+            if r == 0:
+                ring = [(cx, cy)]
+            else:
+                ring = [(i, j) for j in (j0, j1) if 0 <= j < ny
+                        for i in range(max(i0, 0), min(i1, nx - 1) + 1)]
+                ring += [(i, j) for i in (i0, i1) if 0 <= i < nx
+                         for j in range(max(j0 + 1, 0), min(j1 - 1, ny - 1) + 1)]
+            for key in ring:
+                for i in buckets.get(key, ()):
+                    dx = xs[i] - lon
+                    dy = ys[i] - lat
+                    d = dx * dx + dy * dy
+                    if d < best_d or (d == best_d and i < best_i):
+                        best_d = d
+                        best_i = i
+            
+            # Lower bound on the distance to any point outside the scanned square:
+            # the true distance to each strip of the cloud's bbox beyond one of its sides
+            bounds = []
+            if i0 > 0:
+                bounds.append(rect_d2(min_x, min_x + i0 * cell, min_y, max_y, lon, lat))
+            if i1 < nx - 1:
+                bounds.append(rect_d2(min_x + (i1 + 1) * cell, max_x, min_y, max_y, lon, lat))
+            if j0 > 0:
+                bounds.append(rect_d2(min_x, max_x, min_y, min_y + j0 * cell, lon, lat))
+            if j1 < ny - 1:
+                bounds.append(rect_d2(min_x, max_x, min_y + (j1 + 1) * cell, max_y, lon, lat))
+            if not bounds or best_d < min(bounds):
+                break
+            r += 1
+        nearest.append(float(zs[best_i]))
+    return nearest
+
+
+def _nearest_elevations(xs: Sequence, ys: Sequence, zs: Sequence,
+                        locations: List[Tuple[float, float]]) -> List[float]:
+    """
+    Elevation of the nearest LiDAR point (x=lon, y=lat) to each location
+    
+    Uses a scipy KD-tree (optional dependency) over all points, or a grid
+    index (_grid_nearest) without scipy, over at most _GRID_MAX_POINTS of
+    them. Locations get 0.0 when there are no points.
+    """
+    if not locations or not len(zs):
+        return [0.0] * len(locations)
+    
+    try:
+        import numpy as np
+        from scipy.spatial import cKDTree
+    except ImportError:
+        pass
+    else:
+        logger.info("Nearest-point search with scipy KD-tree over %s points", len(zs))
+        tree = cKDTree(np.column_stack([xs, ys]))
+        _, idx = tree.query([(lon, lat) for lat, lon in locations])
+        return np.asarray(zs, dtype=float)[idx].tolist()
+    
+    step = -(-len(zs) // _GRID_MAX_POINTS)
+    if step > 1:
+        xs, ys, zs = xs[::step], ys[::step], zs[::step]
+    logger.info("scipy not installed, nearest-point search with grid index over %s points (stride %s)",
+                len(zs), step)
+    return _grid_nearest(xs, ys, zs, locations)
+
+
+def _in_seq_order(items: List, seqs: List[int]) -> List:
+    """items reordered by their parallel sequence numbers"""
+    return [item for _, item in sorted(zip(seqs, items), key=lambda pair: pair[0])]
+
 
 class OSMToPBSUConverter:
     """Converts OpenStreetMap data to PBSU route format"""
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", cache_dir: Optional[str] = None):
+        """
+        Args:
+            output_dir: Directory the PBSU map is written to
+            cache_dir: Optional directory where convert() caches parsed OSM
+                       data, so re-runs on an unchanged input skip parsing
+        """
         self.output_dir = output_dir
+        self.cache_dir = cache_dir
         self.bus_stops = []
         self.route_ways = []
         self.buildings = []
         self.entrypoints = []
-        logger.info(f"Initialized OSMToPBSUConverter with output directory: {output_dir}")
+        self._stop_coords = []
+        logger.info("Initialized OSMToPBSUConverter with output directory: %s", output_dir)
         
     def parse_osm_json(self, osm_data: Dict) -> None:
         """Parse OSM JSON data and extract relevant information"""
         logger.info("Starting to parse OSM JSON data")
-        elements = osm_data.get('elements', [])
-        logger.info(f"Found {len(elements)} elements in OSM data")
+        self.parse_osm_elements(osm_data.get('elements', []))
+    
+    def parse_osm_json_stream(self, osm_file: str) -> None:
+        """
+        Parse an OSM JSON file, streaming its elements when it is large
+        
+        Files under _STREAM_MIN_SIZE are loaded whole: that is faster than
+        streaming, and a loaded element list lets parse_osm_elements skip
+        nodes no collected way references. Larger files are streamed with
+        ijson (see _iter_osm_elements) to bound memory use.
+        """
+        logger.info("Starting to parse OSM JSON file: %s", osm_file)
+        if os.path.getsize(osm_file) < _STREAM_MIN_SIZE:
+            elements = _load_json_file(osm_file).get('elements', [])
+        else:
+            elements = _iter_osm_elements(osm_file)
+        self.parse_osm_elements(elements)
+    
+    def _parse_cache_path(self, osm_file: str) -> str:
+        """Cache file for an OSM file, keyed by its absolute path, size and mtime"""
+        import hashlib
         
-        # First pass: collect nodes and ways
-        nodes_dict = {}
+        st = os.stat(osm_file)
+        key = f"{_PARSE_CACHE_VERSION}:{os.path.abspath(osm_file)}:{st.st_size}:{st.st_mtime_ns}"
+        return os.path.join(self.cache_dir, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest() + '.pkl')
+    
+    def _load_parse_cache(self, cache_file: str) -> bool:
+        """
+        Restore parsed bus stops, roads and buildings from a cache file
+        
+        The cache directory is trusted: entries are pickles written by
+        _save_parse_cache. Returns False if there is no usable entry.
+        """
+        import pickle
+        
+        try:
+            with open(cache_file, 'rb') as f:
+                bus_stops, route_ways, buildings = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("Ignoring unreadable parse cache %s: %s", cache_file, e)
+            return False
+        self.bus_stops, self.route_ways, self.buildings = bus_stops, route_ways, buildings
+        return True
+    
+    def _save_parse_cache(self, cache_file: str) -> None:
+        """Store the parsed bus stops, roads and buildings; failures only log a warning"""
+        import pickle
+        
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((self.bus_stops, self.route_ways, self.buildings), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            # Readers never see a partially written entry
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning("Could not write parse cache %s: %s", cache_file, e)
+    
+    def parse_osm_elements(self, elements: Iterable[Dict]) -> None:
+        """
+        Parse OSM elements in a single pass
+        
+        Ways whose nodes have not been seen yet are parked until those nodes
+        arrive, so elements can come from a lazy stream (see
+        _iter_osm_elements) in any order. Roads and buildings still come out
+        in element order.
+        
+        When elements is an in-memory sequence, node references of collected
+        ways are counted up front: unreferenced nodes are never stored and
+        each node is dropped from the table once its last way has used it.
+        """
+        # Node table as columns: id -> row index, plus packed lat/lon arrays
+        self._node_index = {}
+        self._node_lats = array('d')
+        self._node_lons = array('d')
+        self._pending_ways = {}
+        self._deferred_ways = []
+        self._node_refcount = None
+        self._node_count = 0
+        # Element order of collected ways, parallel to the roads/buildings added here
+        self._way_seq = 0
+        self._road_seqs = []
+        self._building_seqs = []
+        road_start = len(self.route_ways)
+        building_start = len(self.buildings)
+        if isinstance(elements, Sequence):
+            self._node_refcount = self._count_node_refs(elements)
+        
+        # Dispatch on element type in one pass; relations and others are skipped
+        dispatch = {'node': self._handle_node, 'way': self._handle_way}.get
+        element_count = 0
         for element in elements:
-            if element['type'] == 'node':
-                nodes_dict[element['id']] = element
-                
-                # Check if it's a bus stop
-                tags = element.get('tags', {})
-                if tags.get('highway') == 'bus_stop' or tags.get('public_transport') == 'platform':
-                    bus_stop_data = {
-                        'id': element['id'],
-                        'lat': element['lat'],
-                        'lon': element['lon'],
-                        'name': tags.get('name', f"Bus Stop {element['id']}"),
-                        'tags': tags
-                    }
-                    self.bus_stops.append(bus_stop_data)
-                    logger.debug(f"Found bus stop: {bus_stop_data['name']} at ({element['lat']}, {element['lon']})")
-        
-        logger.info(f"First pass complete: {len(nodes_dict)} nodes, {len(self.bus_stops)} bus stops found")
-        
-        # Second pass: collect ways and relations
-        logger.info("Starting second pass: collecting ways and relations")
+            handler = dispatch(element['type'])
+            if handler is not None:
+                handler(element)
+            element_count += 1
+        logger.info("Found %s elements in OSM data", element_count)
+        
+        # Ways still waiting reference nodes missing from the extract;
+        # keep them with the nodes that are available
+        collect_way = self._collect_way
+        for record in self._deferred_ways:
+            if record[1] > 0:
+                collect_way(record[0], None, record[2])
+        
+        # Parked ways were collected when their last node arrived; restore element order
+        if self._deferred_ways:
+            self.route_ways[road_start:] = _in_seq_order(self.route_ways[road_start:], self._road_seqs)
+            self.buildings[building_start:] = _in_seq_order(self.buildings[building_start:],
+                                                            self._building_seqs)
+        
+        logger.info("Parsing complete: %s nodes, %s bus stops, %s road segments, %s buildings found",
+                    self._node_count, len(self.bus_stops), len(self.route_ways), len(self.buildings))
+        
+        # Release the node table; it is only needed while resolving ways
+        self._node_index = {}
+        self._node_lats = array('d')
+        self._node_lons = array('d')
+        self._pending_ways = {}
+        self._deferred_ways = []
+        self._node_refcount = None
+        self._road_seqs = []
+        self._building_seqs = []
+    
+    def _count_node_refs(self, elements: Sequence) -> Dict[int, int]:
+        """Count how many times collected ways reference each node"""
+        refcount = {}
+        get = refcount.get
         for element in elements:
-            if element['type'] == 'way':
-                tags = element.get('tags', {})
-                
-                # Collect roads
-                if tags.get('highway') in ['primary', 'secondary', 'tertiary', 'residential', 'trunk']:
-                    way_nodes = []
-                    for node_id in element.get('nodes', []):
-                        if node_id in nodes_dict:
-                            node = nodes_dict[node_id]
-                            way_nodes.append({
-                                'lat': node['lat'],
-                                'lon': node['lon']
-                            })
-                    if way_nodes:
-                        self.route_ways.append({
-                            'id': element['id'],
-                            'nodes': way_nodes,
-                            'tags': tags
-                        })
-                        road_name = tags.get('name', f'Way {element["id"]}')
-                        logger.debug(f"Found road: {road_name} with {len(way_nodes)} nodes")
-                
-                # Collect buildings
-                if tags.get('building'):
-                    way_nodes = []
-                    for node_id in element.get('nodes', []):
-                        if node_id in nodes_dict:
-                            node = nodes_dict[node_id]
-                            way_nodes.append({
-                                'lat': node['lat'],
-                                'lon': node['lon']
-                            })
-                    if way_nodes:
-                        # Extract height information
-                        height = self._extract_building_height(tags)
-                        building_data = {
-                            'id': element['id'],
-                            'nodes': way_nodes,
-                            'tags': tags,
-                            'height': height
-                        }
-                        self.buildings.append(building_data)
-                        logger.debug(f"Found building: height={height}m, nodes={len(way_nodes)}, type={tags.get('building', 'yes')}")
-        
-        logger.info(f"Second pass complete: {len(self.route_ways)} road segments, {len(self.buildings)} buildings found")
+            if element['type'] == 'way' and _is_collected_way(element.get('tags')):
+                for node_id in element.get('nodes', []):
+                    refcount[node_id] = get(node_id, 0) + 1
+        return refcount
+    
+    def _handle_node(self, element: Dict) -> None:
+        """Record a node, resolving any ways that were waiting on it"""
+        node_id = element['id']
+        self._node_count += 1
+        lat = element.get('lat')
+        lon = element.get('lon')
+        if lat is None or lon is None:
+            # Nothing to place without coordinates; ways waiting on the node
+            # are kept with their other nodes at the end of the stream
+            return
+        refcount = self._node_refcount
+        if refcount is None or node_id in refcount:
+            self._node_index[node_id] = len(self._node_lats)
+            self._node_lats.append(lat)
+            self._node_lons.append(lon)
+        
+        # Check if it's a bus stop (most nodes are untagged geometry, skip those early)
+        tags = element.get('tags')
+        if tags and (tags.get('highway') == 'bus_stop' or tags.get('public_transport') == 'platform'):
+            bus_stop_data = {
+                'id': node_id,
+                'lat': lat,
+                'lon': lon,
+                'name': tags.get('name', f"Bus Stop {node_id}"),
+                'tags': tags
+            }
+            self.bus_stops.append(bus_stop_data)
+            logger.debug("Found bus stop: %s at (%s, %s)", bus_stop_data['name'], lat, lon)
+        
+        # Finish any ways for which this was the last missing node
+        pending_ways = self._pending_ways
+        if not pending_ways:
+            return
+        waiting = pending_ways.pop(node_id, None)
+        if waiting:
+            for record in waiting:
+                record[1] -= 1
+                if record[1] == 0:
+                    self._collect_way(record[0], None, record[2])
+    
+    def _handle_way(self, element: Dict) -> None:
+        """Collect a road/building way now, or park it until its nodes arrive"""
+        if not _is_collected_way(element.get('tags')):
+            return
+        
+        seq = self._way_seq
+        self._way_seq = seq + 1
+        
+        # Resolve inline when all nodes are already known (nodes listed first)
+        node_ids = element.get('nodes', [])
+        rows = list(map(self._node_index.get, node_ids))
+        if None not in rows:
+            self._collect_way(element, rows, seq)
+            return
+        
+        missing = {node_id for node_id, row in zip(node_ids, rows) if row is None}
+        
+        # Park the way until its missing nodes show up. This is the usual path
+        # for fetch_osm_data.py's "out body; >; out skel qt;" queries, which
+        # list every way before its nodes. Record: [element, missing count, seq]
+        record = [element, len(missing), seq]
+        self._deferred_ways.append(record)
+        pending_ways = self._pending_ways
+        for node_id in missing:
+            pending_ways.setdefault(node_id, []).append(record)
+    
+    def _collect_way(self, element: Dict, rows: Optional[List[int]] = None, seq: int = 0) -> None:
+        """
+        Store a way as a road and/or building using the nodes seen so far
+        
+        rows are the node table rows of the way's nodes when the caller has
+        already resolved them all; otherwise they are looked up here and
+        unknown nodes are skipped. seq is the way's position among collected
+        ways in the input, used to keep the output in element order.
+        """
+        tags = element.get('tags', {})
+        node_index = self._node_index
+        lats = self._node_lats
+        lons = self._node_lons
+        if rows is None:
+            rows = [row for row in map(node_index.get, element.get('nodes', [])) if row is not None]
+        way_lats = array('d', [lats[row] for row in rows])
+        way_lons = array('d', [lons[row] for row in rows])
+        
+        # Drop nodes no remaining way needs
+        refcount = self._node_refcount
+        if refcount is not None:
+            for node_id in element.get('nodes', []):
+                remaining = refcount.get(node_id)
+                if remaining is None:
+                    continue
+                if remaining > 1:
+                    refcount[node_id] = remaining - 1
+                else:
+                    del refcount[node_id]
+                    node_index.pop(node_id, None)
+        
+        if not way_lats:
+            return
+        way_nodes = _WayNodes(way_lats, way_lons)
+        
+        # Collect roads
+        if tags.get('highway') in _ROAD_TYPES:
+            self.route_ways.append({
+                'id': element['id'],
+                'nodes': way_nodes,
+                'tags': tags
+            })
+            self._road_seqs.append(seq)
+            road_name = tags.get('name', f'Way {element["id"]}')
+            logger.debug("Found road: %s with %s nodes", road_name, len(way_nodes))
+        
+        # Collect buildings
+        if tags.get('building'):
+            # Extract height information
+            height = self._extract_building_height(tags)
+            building_data = {
+                'id': element['id'],
+                'nodes': way_nodes,
+                'tags': tags,
+                'height': height
+            }
+            self.buildings.append(building_data)
+            self._building_seqs.append(seq)
+            logger.debug("Found building: height=%sm, nodes=%s, type=%s",
+                         height, len(way_nodes), tags.get('building', 'yes'))
     
     def _extract_building_height(self, tags: Dict) -> float:
         """
@@ -120,56 +916,15 @@ class OSMToPBSUConverter:
         
         Tries multiple sources:
         1. height tag (in meters)
-        2. building:levels tag (floors * 3.5m average)
-        3. building:height tag
-        4. Default to 10m for generic buildings
+        2. building:height tag
+        3. building:levels tag (floors * 3.5m average)
+        4. Default height by building type (10m for generic buildings)
         """
-        # Direct height in meters
-        if 'height' in tags:
-            try:
-                height_str = tags['height'].replace('m', '').replace('M', '').strip()
-                return float(height_str)
-            except (ValueError, AttributeError):
-                pass
-        
-        # Building height tag
-        if 'building:height' in tags:
-            try:
-                height_str = tags['building:height'].replace('m', '').replace('M', '').strip()
-                return float(height_str)
-            except (ValueError, AttributeError):
-                pass
-        
-        # Number of levels (assume 3.5m per floor)
-        if 'building:levels' in tags:
-            try:
-                levels = float(tags['building:levels'])
-                return levels * 3.5
-            except (ValueError, AttributeError):
-                pass
-        
-        # Default heights based on building type
-        building_type = tags.get('building', 'yes')
-        default_heights = {
-            'house': 7.0,
-            'residential': 10.5,  # 3 floors
-            'apartments': 21.0,   # 6 floors
-            'commercial': 14.0,   # 4 floors
-            'retail': 7.0,
-            'industrial': 10.0,
-            'warehouse': 8.0,
-            'office': 35.0,       # 10 floors
-            'hotel': 28.0,        # 8 floors
-            'school': 10.5,
-            'university': 14.0,
-            'hospital': 21.0,
-            'church': 15.0,
-            'cathedral': 25.0,
-        }
-        
-        return default_heights.get(building_type, 10.0)
+        # Only these tags matter, and many buildings share them (e.g. plain building=yes)
+        return _building_height(tags.get('height'), tags.get('building:height'),
+                                tags.get('building:levels'), tags.get('building', 'yes'))
     
-    def fetch_elevation_data(self, locations: List[Tuple[float, float]]) -> Dict[Tuple[float, float], float]:
+    def fetch_elevation_data(self, locations: List[Tuple[float, float]]) -> ElevationSet:
         """
         Fetch elevation data for a list of lat/lon coordinates
         
@@ -180,19 +935,17 @@ class OSMToPBSUConverter:
             locations: List of (latitude, longitude) tuples
         
         Returns:
-            Dictionary mapping (lat, lon) to elevation in meters (default: 0)
+            ElevationSet mapping each distinct (lat, lon) to elevation in meters (default: 0)
         """
-        logger.info(f"Elevation data requested for {len(locations)} locations")
+        logger.info("Elevation data requested for %s locations", len(locations))
         logger.info("API calls disabled - using default elevation of 0m")
         logger.info("For accurate elevation, provide LiDAR HD data file")
         
-        elevations = {}
-        for lat, lon in locations:
-            elevations[(lat, lon)] = 0.0
-        
-        return elevations
+        locations = list(dict.fromkeys(locations))
+        return ElevationSet.from_locations(locations, [0.0] * len(locations))
     
-    def load_lidar_elevation(self, lidar_file: str, locations: List[Tuple[float, float]]) -> Dict[Tuple[float, float], float]:
+    def load_lidar_elevation(self, lidar_file: str, locations: List[Tuple[float, float]],
+                             check_exists: bool = True) -> ElevationSet:
         """
         Load elevation data from LiDAR HD file (French government high-resolution data)
         
@@ -204,17 +957,24 @@ class OSMToPBSUConverter:
         Args:
             lidar_file: Path to LiDAR HD elevation data file
             locations: List of (latitude, longitude) tuples
+            check_exists: Whether to check that lidar_file exists first (callers
+                          that already checked pass False to skip the stat)
         
         Returns:
-            Dictionary mapping (lat, lon) to elevation in meters
+            ElevationSet mapping each distinct (lat, lon) to elevation in meters
+            (0 where no data could be read)
         """
-        logger.info(f"Loading LiDAR HD elevation data from: {lidar_file}")
+        logger.info("Loading LiDAR HD elevation data from: %s", lidar_file)
+        
+        # Look up each location once; the result holds distinct locations like a dict
+        locations = list(dict.fromkeys(locations))
+        default = [0.0] * len(locations)
         
-        if not os.path.exists(lidar_file):
-            logger.error(f"LiDAR file not found: {lidar_file}")
-            return {loc: 0.0 for loc in locations}
+        if check_exists and not os.path.exists(lidar_file):
+            logger.error("LiDAR file not found: %s", lidar_file)
+            return ElevationSet.from_locations(locations, default)
         
-        elevations = {}
+        elevations = default
         file_ext = os.path.splitext(lidar_file)[1].lower()
         
         try:
@@ -222,58 +982,43 @@ class OSMToPBSUConverter:
                 # Try to load GeoTIFF using rasterio (optional dependency)
                 try:
                     import rasterio
-                    from rasterio.transform import rowcol
+                    from rasterio.warp import transform
                     
                     logger.info("Loading GeoTIFF file with rasterio")
                     with rasterio.open(lidar_file) as dataset:
-                        for lat, lon in locations:
-                            try:
-                                # Transform lat/lon to pixel coordinates
-                                row, col = rowcol(dataset.transform, lon, lat)
-                                # Read elevation value
-                                elevation = dataset.read(1)[row, col]
-                                elevations[(lat, lon)] = float(elevation)
-                                logger.debug(f"Elevation at ({lat}, {lon}): {elevation}m")
-                            except Exception as e:
-                                logger.warning(f"Could not read elevation for ({lat}, {lon}): {e}")
-                                elevations[(lat, lon)] = 0.0
+                        xs = [lon for _, lon in locations]
+                        ys = [lat for lat, _ in locations]
+                        # Projected tiles (e.g. Lambert-93) need WGS84 positions reprojected
+                        if dataset.crs is not None and not dataset.crs.is_geographic:
+                            xs, ys = transform('EPSG:4326', dataset.crs, xs, ys)
+                        # Read only the pixels under the locations, in one batch
+                        samples = dataset.sample(zip(xs, ys), indexes=1)
+                        # Points outside the tile read as nodata; those and NaN
+                        # pixels get the 0.0 default rather than a fake depth
+                        nodata = dataset.nodata
+                        elevations = [
+                            0.0 if value == nodata or math.isnan(value) else value
+                            for value in (float(values[0]) for values in samples)
+                        ]
                     
-                    logger.info(f"Successfully loaded {len(elevations)} elevation values from GeoTIFF")
+                    logger.info("Successfully loaded %s elevation values from GeoTIFF", len(elevations))
                     
                 except ImportError:
                     logger.error("rasterio not installed. Install with: pip install rasterio")
                     logger.info("Falling back to default elevation")
-                    elevations = {loc: 0.0 for loc in locations}
+                    elevations = default
                     
             elif file_ext in ['.xyz', '.txt']:
                 # Load XYZ ASCII format
                 logger.info("Loading XYZ ASCII file")
-                xyz_data = []
-                with open(lidar_file, 'r') as f:
-                    for line in f:
-                        parts = line.strip().split()
-                        if len(parts) >= 3:
-                            try:
-                                x, y, z = float(parts[0]), float(parts[1]), float(parts[2])
-                                xyz_data.append((x, y, z))
-                            except ValueError:
-                                continue
+                xs, ys, zs = _read_xyz_points(lidar_file)
                 
-                logger.info(f"Loaded {len(xyz_data)} points from XYZ file")
+                logger.info("Loaded %s points from XYZ file", len(zs))
                 
-                # Simple nearest neighbor interpolation
-                for lat, lon in locations:
-                    min_dist = float('inf')
-                    nearest_z = 0.0
-                    for x, y, z in xyz_data[:10000]:  # Limit search for performance
-                        dist = math.sqrt((x - lon)**2 + (y - lat)**2)
-                        if dist < min_dist:
-                            min_dist = dist
-                            nearest_z = z
-                    elevations[(lat, lon)] = nearest_z
-                    logger.debug(f"Elevation at ({lat}, {lon}): {nearest_z}m (dist: {min_dist:.6f})")
+                # Nearest neighbor interpolation
+                elevations = _nearest_elevations(xs, ys, zs, locations)
                 
-                logger.info(f"Interpolated {len(elevations)} elevation values from XYZ data")
+                logger.info("Interpolated %s elevation values from XYZ data", len(elevations))
                 
             elif file_ext in ['.las', '.laz']:
                 # Try to load LAS/LAZ using laspy (optional dependency)
@@ -282,40 +1027,31 @@ class OSMToPBSUConverter:
                     
                     logger.info("Loading LAS/LAZ file with laspy")
                     las = laspy.read(lidar_file)
-                    points = [(p.X, p.Y, p.Z) for p in las.points[:100000]]  # Limit for performance
                     
-                    logger.info(f"Loaded {len(points)} points from LAS file")
+                    logger.info("Loaded %s points from LAS file", len(las.points))
                     
-                    # Simple nearest neighbor interpolation
-                    for lat, lon in locations:
-                        min_dist = float('inf')
-                        nearest_z = 0.0
-                        for x, y, z in points:
-                            dist = math.sqrt((x - lon)**2 + (y - lat)**2)
-                            if dist < min_dist:
-                                min_dist = dist
-                                nearest_z = z
-                        elevations[(lat, lon)] = nearest_z
-                        logger.debug(f"Elevation at ({lat}, {lon}): {nearest_z}m")
+                    # Nearest neighbor interpolation on the scaled coordinate arrays
+                    # (X/Y/Z are the raw integers stored in the file)
+                    elevations = _nearest_elevations(las.x, las.y, las.z, locations)
                     
-                    logger.info(f"Interpolated {len(elevations)} elevation values from LAS data")
+                    logger.info("Interpolated %s elevation values from LAS data", len(elevations))
                     
                 except ImportError:
                     logger.error("laspy not installed. Install with: pip install laspy")
                     logger.info("Falling back to default elevation")
-                    elevations = {loc: 0.0 for loc in locations}
+                    elevations = default
             else:
-                logger.error(f"Unsupported LiDAR file format: {file_ext}")
+                logger.error("Unsupported LiDAR file format: %s", file_ext)
                 logger.info("Supported formats: .tif, .tiff, .xyz, .txt, .las, .laz")
-                elevations = {loc: 0.0 for loc in locations}
+                elevations = default
                 
         except Exception as e:
-            logger.error(f"Error loading LiDAR data: {e}")
+            logger.error("Error loading LiDAR data: %s", e)
             import traceback
             logger.error(traceback.format_exc())
-            elevations = {loc: 0.0 for loc in locations}
+            elevations = default
         
-        return elevations
+        return ElevationSet.from_locations(locations, elevations)
     
     def lat_lon_to_unity_coords(self, lat: float, lon: float, 
                                 origin_lat: float, origin_lon: float) -> Tuple[float, float, float]:
@@ -328,26 +1064,55 @@ class OSMToPBSUConverter:
         - Z is north-south (north is positive)
         
         Note: Y and Z axes are swapped between Blender and Unity!
+        
+        X is the haversine great-circle distance along the point's own
+        parallel, which stays accurate over large extracts where the flat
+        small-angle approximation drifts. Z is the meridian arc length.
         """
-        # Earth radius in meters
-        earth_radius = 6371000
+        return self._make_projector(origin_lat, origin_lon)(lat, lon)
+    
+    def _make_projector(self, origin_lat: float, origin_lon: float) -> _OriginProjection:
+        """
+        Build a (lat, lon) -> (x, y, z) projection function for a fixed origin
         
-        # Convert to radians
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        origin_lat_rad = math.radians(origin_lat)
-        origin_lon_rad = math.radians(origin_lon)
+        Backs lat_lon_to_unity_coords; the origin terms are computed once so
+        hot loops only pay for the per-point conversion. Projectors are cached
+        per origin, so repeated scalar calls do not rebuild them.
+        """
+        return _origin_projector(origin_lat, origin_lon)
+    
+    def lat_lon_to_unity_coords_batch(self, lats: Sequence[float], lons: Sequence[float],
+                                      origin_lat: float, origin_lon: float
+                                      ) -> Tuple[List[float], List[float], List[float]]:
+        """
+        Convert parallel latitude/longitude sequences to Unity coordinates
         
-        # Calculate differences
-        dlat = lat_rad - origin_lat_rad
-        dlon = lon_rad - origin_lon_rad
+        Batch form of lat_lon_to_unity_coords with identical results.
         
-        # Convert to meters (approximate for small distances)
-        x = dlon * earth_radius * math.cos(origin_lat_rad)  # East-West
-        z = dlat * earth_radius  # North-South
-        y = 0.0  # Ground level
+        Returns:
+            Tuple of (xs, ys, zs) lists, in input order (ys are ground level)
+        """
+        xs, zs = _origin_projector(origin_lat, origin_lon).columns(lats, lons)
+        return xs, [0.0] * len(xs), zs
+    
+    def _project_stops(self, origin_lat: float, origin_lon: float) -> List[Tuple[float, float, float]]:
+        """
+        Project every bus stop to Unity coordinates in one batch
         
-        return (x, y, z)
+        The result is cached on self._stop_coords (in self.bus_stops order) so
+        the entrypoints, geographic data and README writers can share it.
+        """
+        self._stop_coords = self._stop_coordinates(origin_lat, origin_lon)
+        return self._stop_coords
+    
+    def _stop_coordinates(self, origin_lat: float, origin_lon: float) -> List[Tuple[float, float, float]]:
+        """Unity (x, y, z) of every bus stop, in self.bus_stops order"""
+        stops = self.bus_stops
+        xs, ys, zs = self.lat_lon_to_unity_coords_batch(
+            [stop['lat'] for stop in stops], [stop['lon'] for stop in stops],
+            origin_lat, origin_lon
+        )
+        return list(zip(xs, ys, zs))
     
     def calculate_rotation_y(self, lat1: float, lon1: float, 
                             lat2: float, lon2: float) -> float:
@@ -367,81 +1132,103 @@ class OSMToPBSUConverter:
         
         return angle_deg
     
+    def _bearings(self, points_from: List[Tuple[float, float]],
+                  points_to: List[Tuple[float, float]]) -> List[float]:
+        """
+        Batch form of calculate_rotation_y over paired (lat, lon) points
+        
+        Returns one heading in degrees (0-360) per pair.
+        """
+        atan2 = math.atan2
+        degrees = math.degrees
+        return [
+            (degrees(atan2(lon2 - lon1, lat2 - lat1)) + 360) % 360
+            for (lat1, lon1), (lat2, lon2) in zip(points_from, points_to)
+        ]
+    
     def generate_entrypoints_list(self) -> str:
         """Generate entrypoints_list.txt content"""
-        lines = []
-        for i, stop in enumerate(self.bus_stops, 1):
-            # Clean name for internal use (no spaces or special chars)
-            internal_name = stop['name'].replace(' ', '_').replace('-', '_')
-            internal_name = ''.join(c for c in internal_name if c.isalnum() or c == '_')
-            lines.append(f"{internal_name}")
-        return '\n'.join(lines)
-    
-    def generate_entrypoints_txt(self, origin_lat: float, origin_lon: float) -> str:
-        """Generate entrypoints.txt content with bus stop positions"""
-        lines = []
-        
-        for i, stop in enumerate(self.bus_stops, 1):
-            # Clean name for internal use
-            internal_name = stop['name'].replace(' ', '_').replace('-', '_')
-            internal_name = ''.join(c for c in internal_name if c.isalnum() or c == '_')
-            
-            # Convert to Unity coordinates
-            x, y, z = self.lat_lon_to_unity_coords(
-                stop['lat'], stop['lon'], origin_lat, origin_lon
-            )
-            
-            # Calculate rotation (default facing north if we don't have direction info)
-            rot_y = 0  # Default facing north
-            
-            lines.append(f"[entrypoint_{i}]")
-            lines.append(f"name={internal_name}")
-            lines.append(f"posX={x:.6f}")
-            lines.append(f"posY={y:.6f}")
-            lines.append(f"posZ={z:.6f}")
-            lines.append(f"rotX=0")
-            lines.append(f"rotY={rot_y}")
-            lines.append(f"rotZ=0")
-            lines.append("")
-        
-        return '\n'.join(lines)
+        return '\n'.join(map(_internal_name, self.bus_stops))
+    
+    def generate_entrypoints_txt(self, origin_lat: float, origin_lon: float,
+                                 stop_coords: Optional[List[Tuple[float, float, float]]] = None,
+                                 headings: Optional[List[float]] = None) -> str:
+        """
+        Generate entrypoints.txt content with bus stop positions
+        
+        Args:
+            origin_lat: Origin latitude
+            origin_lon: Origin longitude
+            stop_coords: Optional pre-projected (x, y, z) per bus stop, in
+                         self.bus_stops order (projected here if omitted)
+            headings: Optional rotY in degrees per bus stop, e.g. from
+                      _bearings (all stops face north if omitted)
+        """
+        entrypoints_buf = io.StringIO()
+        self._write_stop_outputs(None, entrypoints_buf, None,
+                                 origin_lat, origin_lon, stop_coords, headings)
+        return entrypoints_buf.getvalue()
+    
+    def _write_stop_outputs(self, list_fh, entrypoints_fh, readme_fh,
+                            origin_lat: float, origin_lon: float,
+                            stop_coords: Optional[List[Tuple[float, float, float]]] = None,
+                            headings: Optional[List[float]] = None) -> None:
+        """
+        Stream entrypoints_list.txt, entrypoints.txt and the README bus stop
+        lines into open text handles, one stop at a time
+        
+        A handle may be None to skip that output. Stops are projected here,
+        without touching self._stop_coords, when stop_coords is omitted.
+        """
+        if stop_coords is None:
+            stop_coords = self._stop_coordinates(origin_lat, origin_lon)
+        if headings is None:
+            # Default facing north as we don't have direction info
+            headings = itertools.repeat(0)
+        
+        list_write = list_fh.write if list_fh is not None else None
+        entrypoints_write = entrypoints_fh.write if entrypoints_fh is not None else None
+        readme_write = readme_fh.write if readme_fh is not None else None
+        
+        for i, (stop, (x, y, z), rot_y) in enumerate(zip(self.bus_stops, stop_coords, headings), 1):
+            internal_name = _internal_name(stop)
+            # One name per line; entrypoint blocks separated by an empty line
+            if list_write is not None:
+                if i > 1:
+                    list_write('\n')
+                list_write(internal_name)
+            if entrypoints_write is not None:
+                if i > 1:
+                    entrypoints_write('\n')
+                entrypoints_write(_ENTRYPOINT_TMPL % (i, internal_name, x, y, z, rot_y))
+            if readme_write is not None:
+                readme_write(_README_STOP_TMPL % (i, stop['name'], x, y, z))
     
     def generate_busstop_txt(self, stop: Dict, index: int, 
                             origin_lat: float, origin_lon: float) -> str:
         """Generate individual bus stop configuration file"""
-        internal_name = stop['name'].replace(' ', '_').replace('-', '_')
-        internal_name = ''.join(c for c in internal_name if c.isalnum() or c == '_')
-        
-        lines = [
-            f"[busstop]",
-            f"name={stop['name']}",
-            f"side=right",  # Default to right side
-            f"radius=1",
-            f"paxAmount=5",  # Default 5 passengers
-            f"",
-            f"[from_3d]",
-            f"readFrom3D=1",
-            f"prefix={internal_name}",
-            f"rotY=0",
-            f""
-        ]
+        return _BUSSTOP_TMPL % (stop['name'], _internal_name(stop))
+    
+    def _write_busstop_chunk(self, chunk: List[Tuple[str, Dict]]) -> None:
+        """
+        Render and write a batch of (path, stop) bus stop files
         
-        return '\n'.join(lines)
+        Same content as generate_busstop_txt, written as the shared template
+        segments around each stop's encoded name fields.
+        """
+        head, middle, tail = _BUSSTOP_PARTS
+        for path, stop in chunk:
+            _write_byte_parts(path, (
+                head, stop['name'].encode('utf-8'),
+                middle, _internal_name(stop).encode('utf-8'),
+                tail
+            ))
     
     def generate_map_txt(self, map_name: str, route_name: str) -> str:
         """Generate main .map.txt file"""
-        lines = [
-            f"[map]",
-            f"baseDir={map_name}",
-            f"modelsDir={route_name}",
-            f"textures=textures",
-            f"mapModVersion=2",
-            f"preview=preview.png",
-            f""
-        ]
-        return '\n'.join(lines)
+        return _MAP_TMPL % (map_name, route_name)
     
-    def create_directory_structure(self, map_name: str, route_name: str) -> None:
+    def create_directory_structure(self, map_name: str, route_name: str) -> Tuple[str, str, str]:
         """Create the PBSU directory structure"""
         base_dir = os.path.join(self.output_dir, map_name)
         tiles_dir = os.path.join(base_dir, 'tiles', route_name)
@@ -449,11 +1236,10 @@ class OSMToPBSUConverter:
         dest_dir = os.path.join(base_dir, 'dest')
         busstops_dir = os.path.join(tiles_dir, 'aipeople', 'busstops')
         
-        # Create directories
-        os.makedirs(tiles_dir, exist_ok=True)
+        # Create leaf directories only; busstops_dir brings tiles_dir and base_dir with it
+        os.makedirs(busstops_dir, exist_ok=True)
         os.makedirs(textures_dir, exist_ok=True)
         os.makedirs(dest_dir, exist_ok=True)
-        os.makedirs(busstops_dir, exist_ok=True)
         
         return base_dir, tiles_dir, busstops_dir
     
@@ -461,46 +1247,69 @@ class OSMToPBSUConverter:
                 origin_lat: Optional[float] = None, 
                 origin_lon: Optional[float] = None,
                 lidar_file: Optional[str] = None) -> None:
-        """Main conversion function"""
+        """Main conversion function: parse an OSM JSON file and generate the PBSU map"""
         
-        logger.info("="*60)
-        logger.info("Starting OSM to PBSU Conversion")
-        logger.info("="*60)
-        logger.info(f"OSM file: {osm_file}")
-        logger.info(f"Map name: {map_name}")
-        logger.info(f"Route name: {route_name}")
+        self._log_conversion_start(map_name, route_name, osm_file)
         
-        print(f"Loading OSM data from {osm_file}...")
-        logger.info(f"Loading OSM data from {osm_file}...")
+        print(f"Loading and parsing OSM data from {osm_file}...")
+        logger.info("Loading and parsing OSM data from %s...", osm_file)
         try:
-            with open(osm_file, 'r', encoding='utf-8') as f:
-                osm_data = json.load(f)
-            logger.info("Successfully loaded OSM JSON data")
+            cache_file = self._parse_cache_path(osm_file) if self.cache_dir else None
+            if cache_file and self._load_parse_cache(cache_file):
+                logger.info("Loaded parsed OSM data from cache: %s", cache_file)
+            else:
+                self.parse_osm_json_stream(osm_file)
+                if cache_file:
+                    self._save_parse_cache(cache_file)
         except Exception as e:
-            logger.error(f"Failed to load OSM file: {e}")
+            logger.error("Failed to load OSM data: %s", e)
             raise
         
-        print("Parsing OSM data...")
-        logger.info("Parsing OSM data...")
-        try:
-            self.parse_osm_json(osm_data)
-        except Exception as e:
-            logger.error(f"Failed to parse OSM data: {e}")
-            raise
+        self._generate_pbsu(map_name, route_name, origin_lat, origin_lon, lidar_file)
+    
+    def convert_from_data(self, osm_data: Dict, map_name: str, route_name: str,
+                          origin_lat: Optional[float] = None,
+                          origin_lon: Optional[float] = None,
+                          lidar_file: Optional[str] = None) -> None:
+        """
+        Generate the PBSU map from OSM JSON data already in memory
         
+        Same as convert() for callers that fetched or built the Overpass
+        response themselves, without writing it to a file first.
+        """
+        self._log_conversion_start(map_name, route_name)
+        
+        self.parse_osm_json(osm_data)
+        self._generate_pbsu(map_name, route_name, origin_lat, origin_lon, lidar_file)
+    
+    def _log_conversion_start(self, map_name: str, route_name: str,
+                              osm_file: Optional[str] = None) -> None:
+        """Log the start banner shared by convert() and convert_from_data()"""
+        logger.info(_SEP)
+        logger.info("Starting OSM to PBSU Conversion")
+        logger.info(_SEP)
+        if osm_file is not None:
+            logger.info("OSM file: %s", osm_file)
+        logger.info("Map name: %s", map_name)
+        logger.info("Route name: %s", route_name)
+    
+    def _generate_pbsu(self, map_name: str, route_name: str,
+                       origin_lat: Optional[float], origin_lon: Optional[float],
+                       lidar_file: Optional[str]) -> None:
+        """Write the PBSU map, geographic data and README for the parsed OSM data"""
         print(f"Found {len(self.bus_stops)} bus stops")
         print(f"Found {len(self.route_ways)} road segments")
         print(f"Found {len(self.buildings)} buildings")
         
-        logger.info(f"Parsing complete:")
-        logger.info(f"  - Bus stops: {len(self.bus_stops)}")
-        logger.info(f"  - Road segments: {len(self.route_ways)}")
-        logger.info(f"  - Buildings: {len(self.buildings)}")
+        logger.info("Parsing complete:")
+        logger.info("  - Bus stops: %s", len(self.bus_stops))
+        logger.info("  - Road segments: %s", len(self.route_ways))
+        logger.info("  - Buildings: %s", len(self.buildings))
         
         # Count buildings with height data
         buildings_with_height = sum(1 for b in self.buildings if b.get('height', 0) > 0)
         print(f"  - {buildings_with_height} buildings have height information")
-        logger.info(f"  - Buildings with height data: {buildings_with_height}")
+        logger.info("  - Buildings with height data: %s", buildings_with_height)
         
         if len(self.bus_stops) == 0:
             logger.error("No bus stops found in OSM data!")
@@ -512,9 +1321,12 @@ class OSMToPBSUConverter:
             origin_lat = self.bus_stops[0]['lat']
             origin_lon = self.bus_stops[0]['lon']
             print(f"Using origin coordinates: {origin_lat}, {origin_lon}")
-            logger.info(f"Using first bus stop as origin: ({origin_lat}, {origin_lon})")
+            logger.info("Using first bus stop as origin: (%s, %s)", origin_lat, origin_lon)
         else:
-            logger.info(f"Using provided origin coordinates: ({origin_lat}, {origin_lon})")
+            logger.info("Using provided origin coordinates: (%s, %s)", origin_lat, origin_lon)
+        
+        # Project bus stops once; reused by entrypoints, geographic data and README
+        stop_coords = self._project_stops(origin_lat, origin_lon)
         
         print("Creating directory structure...")
         logger.info("Creating directory structure...")
@@ -522,12 +1334,12 @@ class OSMToPBSUConverter:
             base_dir, tiles_dir, busstops_dir = self.create_directory_structure(
                 map_name, route_name
             )
-            logger.info(f"Created directories:")
-            logger.info(f"  - Base: {base_dir}")
-            logger.info(f"  - Tiles: {tiles_dir}")
-            logger.info(f"  - Bus stops: {busstops_dir}")
+            logger.info("Created directories:")
+            logger.info("  - Base: %s", base_dir)
+            logger.info("  - Tiles: %s", tiles_dir)
+            logger.info("  - Bus stops: %s", busstops_dir)
         except Exception as e:
-            logger.error(f"Failed to create directory structure: {e}")
+            logger.error("Failed to create directory structure: %s", e)
             raise
         
         print("Generating PBSU files...")
@@ -537,51 +1349,49 @@ class OSMToPBSUConverter:
         try:
             map_txt = self.generate_map_txt(map_name, route_name)
             map_file = os.path.join(self.output_dir, f"{map_name}.map.txt")
-            with open(map_file, 'w', encoding='utf-8') as f:
-                f.write(map_txt)
+            _write_text_file(map_file, map_txt)
             print(f"Created {map_file}")
-            logger.info(f"Created main map file: {map_file}")
+            logger.info("Created main map file: %s", map_file)
         except Exception as e:
-            logger.error(f"Failed to generate map file: {e}")
+            logger.error("Failed to generate map file: %s", e)
             raise
         
-        # Generate entrypoints_list.txt
+        # Stream entrypoints_list.txt and entrypoints.txt straight to disk,
+        # keeping the README bus stop lines for later
         try:
-            entrypoints_list = self.generate_entrypoints_list()
             entrypoints_list_file = os.path.join(tiles_dir, 'entrypoints_list.txt')
-            with open(entrypoints_list_file, 'w', encoding='utf-8') as f:
-                f.write(entrypoints_list)
-            print(f"Created {entrypoints_list_file}")
-            logger.info(f"Created entrypoints list: {entrypoints_list_file}")
-        except Exception as e:
-            logger.error(f"Failed to generate entrypoints list: {e}")
-            raise
-        
-        # Generate entrypoints.txt
-        try:
-            entrypoints_txt = self.generate_entrypoints_txt(origin_lat, origin_lon)
             entrypoints_file = os.path.join(tiles_dir, 'entrypoints.txt')
-            with open(entrypoints_file, 'w', encoding='utf-8') as f:
-                f.write(entrypoints_txt)
+            readme_stop_buf = io.StringIO()
+            with open(entrypoints_list_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as list_fh, \
+                    open(entrypoints_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as entrypoints_fh:
+                self._write_stop_outputs(list_fh, entrypoints_fh, readme_stop_buf,
+                                         origin_lat, origin_lon, stop_coords)
+            readme_stop_lines = readme_stop_buf.getvalue()
+            print(f"Created {entrypoints_list_file}")
+            logger.info("Created entrypoints list: %s", entrypoints_list_file)
             print(f"Created {entrypoints_file}")
-            logger.info(f"Created entrypoints file: {entrypoints_file}")
+            logger.info("Created entrypoints file: %s", entrypoints_file)
         except Exception as e:
-            logger.error(f"Failed to generate entrypoints: {e}")
+            logger.error("Failed to generate entrypoints: %s", e)
             raise
         
         # Generate individual bus stop files
         try:
-            for i, stop in enumerate(self.bus_stops, 1):
-                busstop_txt = self.generate_busstop_txt(stop, i, origin_lat, origin_lon)
-                internal_name = stop['name'].replace(' ', '_').replace('-', '_')
-                internal_name = ''.join(c for c in internal_name if c.isalnum() or c == '_')
-                busstop_file = os.path.join(busstops_dir, f"{internal_name}.txt")
-                with open(busstop_file, 'w', encoding='utf-8') as f:
-                    f.write(busstop_txt)
+            from concurrent.futures import ThreadPoolExecutor
+            
+            busstop_prefix = os.path.join(busstops_dir, '')
+            # Keyed by path so stops sharing a name keep last-one-wins behaviour
+            jobs = list({
+                f"{busstop_prefix}{_internal_name(stop)}.txt": stop for stop in self.bus_stops
+            }.items())
+            chunks = [jobs[k:k + _WRITE_CHUNK_SIZE] for k in range(0, len(jobs), _WRITE_CHUNK_SIZE)]
+            with ThreadPoolExecutor(max_workers=_WRITE_WORKERS) as executor:
+                # list() drains the results so write errors are raised here
+                list(executor.map(self._write_busstop_chunk, chunks))
             print(f"Created {len(self.bus_stops)} bus stop configuration files")
-            logger.info(f"Created {len(self.bus_stops)} bus stop configuration files")
+            logger.info("Created %s bus stop configuration files", len(self.bus_stops))
         except Exception as e:
-            logger.error(f"Failed to generate bus stop files: {e}")
+            logger.error("Failed to generate bus stop files: %s", e)
             raise
         
         # Fetch elevation data for bus stops and key points
@@ -590,25 +1400,26 @@ class OSMToPBSUConverter:
         locations = [(stop['lat'], stop['lon']) for stop in self.bus_stops]
         # Add some road points for terrain mapping
         for way in self.route_ways[:10]:  # Sample first 10 road segments
-            for node in way['nodes'][::5]:  # Every 5th node
-                locations.append((node['lat'], node['lon']))
+            way_nodes = way['nodes']
+            # Every 5th node
+            locations.extend(zip(way_nodes.lats[::5], way_nodes.lons[::5]))
         
-        logger.info(f"Prepared {len(locations)} locations for elevation lookup")
+        logger.info("Prepared %s locations for elevation lookup", len(locations))
         
         # Use LiDAR HD if available, otherwise use default values
         if lidar_file and os.path.exists(lidar_file):
-            logger.info(f"Using LiDAR HD file for elevation: {lidar_file}")
+            logger.info("Using LiDAR HD file for elevation: %s", lidar_file)
             print(f"Loading LiDAR HD data from: {lidar_file}")
-            elevations = self.load_lidar_elevation(lidar_file, locations)
+            elevations = self.load_lidar_elevation(lidar_file, locations, check_exists=False)
         else:
             if lidar_file:
-                logger.warning(f"LiDAR file not found: {lidar_file}, using default elevation")
+                logger.warning("LiDAR file not found: %s, using default elevation", lidar_file)
             else:
                 logger.info("No LiDAR file provided, using default elevation of 0m")
             elevations = self.fetch_elevation_data(locations)
         
         print(f"Fetched elevation data for {len(elevations)} points")
-        logger.info(f"Elevation data ready for {len(elevations)} points")
+        logger.info("Elevation data ready for %s points", len(elevations))
         
         # Export geographic data (buildings, elevations) for 3D generation
         logger.info("Exporting geographic data...")
@@ -621,140 +1432,105 @@ class OSMToPBSUConverter:
         
         # Convert buildings to Unity coordinates with height
         logger.info("Converting building data to Unity coordinates...")
-        for building in self.buildings:
-            if not building['nodes']:
-                continue
-            
-            # Calculate building center
-            center_lat = sum(n['lat'] for n in building['nodes']) / len(building['nodes'])
-            center_lon = sum(n['lon'] for n in building['nodes']) / len(building['nodes'])
-            center_x, center_y, center_z = self.lat_lon_to_unity_coords(
-                center_lat, center_lon, origin_lat, origin_lon
-            )
-            
-            # Convert footprint nodes
-            footprint = []
-            for node in building['nodes']:
-                x, y, z = self.lat_lon_to_unity_coords(
-                    node['lat'], node['lon'], origin_lat, origin_lon
-                )
-                footprint.append({'x': x, 'y': y, 'z': z})
+        buildings_out = geographic_data['buildings']
+        project_batch = self.lat_lon_to_unity_coords_batch
+        buildings = [building for building in self.buildings if building['nodes']]
+        
+        # Building centers: mean of each packed lat/lon column, projected in one batch
+        center_xs, _, center_zs = project_batch(
+            [sum(building['nodes'].lats) / len(building['nodes']) for building in buildings],
+            [sum(building['nodes'].lons) / len(building['nodes']) for building in buildings],
+            origin_lat, origin_lon
+        )
+        
+        # All footprints as flat columns plus per-building offsets, projected in one batch
+        footprint_lats = array('d')
+        footprint_lons = array('d')
+        offsets = [0]
+        for building in buildings:
+            footprint_lats.extend(building['nodes'].lats)
+            footprint_lons.extend(building['nodes'].lons)
+            offsets.append(len(footprint_lats))
+        xs, _, zs = project_batch(footprint_lats, footprint_lons, origin_lat, origin_lon)
+        
+        for building, start, end, center_x, center_z in zip(buildings, offsets, offsets[1:],
+                                                            center_xs, center_zs):
+            footprint = [{'x': x, 'y': 0.0, 'z': z} for x, z in zip(xs[start:end], zs[start:end])]
             
-            geographic_data['buildings'].append({
-                'center': {'x': center_x, 'y': center_y, 'z': center_z},
+            buildings_out.append({
+                'center': {'x': center_x, 'y': 0.0, 'z': center_z},
                 'footprint': footprint,
                 'height': building['height'],
                 'type': building['tags'].get('building', 'yes'),
                 'name': building['tags'].get('name', '')
             })
         
-        logger.info(f"Converted {len(geographic_data['buildings'])} buildings")
+        logger.info("Converted %s buildings", len(geographic_data['buildings']))
         
         # Add elevation data
         logger.info("Adding elevation data to geographic export...")
-        for (lat, lon), elevation in elevations.items():
-            x, y, z = self.lat_lon_to_unity_coords(lat, lon, origin_lat, origin_lon)
-            geographic_data['elevations'][f"{lat},{lon}"] = {
+        elevations_out = geographic_data['elevations']
+        xs, _, zs = project_batch(elevations.lats, elevations.lons, origin_lat, origin_lon)
+        # "lat,lon" keys, formatted in one map over the columns
+        keys = map('{},{}'.format, elevations.lats, elevations.lons)
+        for key, elevation, x, z in zip(keys, elevations.z, xs, zs):
+            elevations_out[key] = {
                 'x': x, 'y': elevation, 'z': z, 'elevation': elevation
             }
         
-        logger.info(f"Added {len(geographic_data['elevations'])} elevation points")
+        logger.info("Added %s elevation points", len(geographic_data['elevations']))
         
         # Add bus stop data with positions
         logger.info("Adding bus stop data to geographic export...")
-        for stop in self.bus_stops:
-            x, y, z = self.lat_lon_to_unity_coords(
-                stop['lat'], stop['lon'], origin_lat, origin_lon
-            )
-            internal_name = stop['name'].replace(' ', '_').replace('-', '_')
-            internal_name = ''.join(c for c in internal_name if c.isalnum() or c == '_')
-            geographic_data['bus_stops'].append({
+        bus_stops_out = geographic_data['bus_stops']
+        for stop, (x, y, z) in zip(self.bus_stops, stop_coords):
+            bus_stops_out.append({
                 'name': stop['name'],
-                'internal_name': internal_name,
+                'internal_name': _internal_name(stop),
                 'position': {'x': x, 'y': y, 'z': z},
                 'lat': stop['lat'],
                 'lon': stop['lon']
             })
         
-        logger.info(f"Added {len(geographic_data['bus_stops'])} bus stops")
+        logger.info("Added %s bus stops", len(geographic_data['bus_stops']))
         
         # Save geographic data
         try:
             geo_data_file = os.path.join(base_dir, 'geographic_data.json')
-            with open(geo_data_file, 'w', encoding='utf-8') as f:
-                json.dump(geographic_data, f, indent=2)
+            _write_json_file(geo_data_file, geographic_data)
             print(f"Created {geo_data_file}")
             print(f"  - Exported {len(geographic_data['buildings'])} buildings with heights")
             print(f"  - Exported {len(geographic_data['elevations'])} elevation points")
-            logger.info(f"Successfully saved geographic data to {geo_data_file}")
+            logger.info("Successfully saved geographic data to %s", geo_data_file)
         except Exception as e:
-            logger.error(f"Failed to save geographic data: {e}")
+            logger.error("Failed to save geographic data: %s", e)
             raise
         
         # Create README with instructions
         logger.info("Creating README file...")
-        readme_content = f"""# PBSU Route: {map_name} - {route_name}
-
-## Generated from OpenStreetMap Data
-
-This route was automatically generated from OpenStreetMap data using osm_to_pbsu.py
-
-### Statistics:
-- Bus stops: {len(self.bus_stops)}
-- Road segments: {len(self.route_ways)}
-- Buildings: {len(self.buildings)} ({buildings_with_height} with height data)
-- Elevation points: {len(elevations)}
-- Origin coordinates: {origin_lat}, {origin_lon}
-
-### Next Steps:
-
-1. **Create 3D Models in Blender 2.8 or higher:**
-   - Model the road network and buildings
-   - Place bus stop objects at the coordinates specified in entrypoints.txt
-   - Each bus stop needs:
-     - A trigger object named `{{stopname}}_trigger`
-     - Passenger spawn points named `{{stopname}}.000`, `{{stopname}}.001`, etc.
-   - Export to .3ds format and place in tiles/{route_name}/
-
-2. **Add Textures:**
-   - Place texture files in {map_name}/textures/
-
-3. **Configure Destinations:**
-   - Create destination folders in {map_name}/dest/
-   - Add destination display images
-
-4. **Create Preview Image:**
-   - Add preview.png (640x360px recommended) in {map_name}/
-
-5. **Test in Proton Bus Simulator:**
-   - Copy the {map_name}/ folder to your PBSU mods/maps/ directory
-   - Copy {map_name}.map.txt to mods/maps/
-   - Launch PBSU and select the map
-
-### Bus Stops:
-"""
-        for i, stop in enumerate(self.bus_stops, 1):
-            x, y, z = self.lat_lon_to_unity_coords(
-                stop['lat'], stop['lon'], origin_lat, origin_lon
-            )
-            readme_content += f"\n{i}. {stop['name']} - Position: ({x:.2f}, {y:.2f}, {z:.2f})"
+        readme_header = _README_TMPL.format(
+            map_name=map_name, route_name=route_name,
+            stop_count=len(self.bus_stops), road_count=len(self.route_ways),
+            building_count=len(self.buildings), buildings_with_height=buildings_with_height,
+            elevation_count=len(elevations), origin_lat=origin_lat, origin_lon=origin_lon
+        )
         
         try:
             readme_file = os.path.join(base_dir, 'README.md')
-            with open(readme_file, 'w', encoding='utf-8') as f:
-                f.write(readme_content)
+            # Header and stop lines are written in sequence, never concatenated
+            _write_text_file(readme_file, readme_header, readme_stop_lines)
             print(f"Created {readme_file}")
-            logger.info(f"Created README file: {readme_file}")
+            logger.info("Created README file: %s", readme_file)
         except Exception as e:
-            logger.error(f"Failed to create README: {e}")
+            logger.error("Failed to create README: %s", e)
             raise
         
         print(f"\n✓ Conversion complete!")
         print(f"Output directory: {base_dir}")
-        logger.info("="*60)
+        logger.info(_SEP)
         logger.info("OSM to PBSU Conversion Complete!")
-        logger.info(f"Output directory: {base_dir}")
-        logger.info("="*60)
+        logger.info("Output directory: %s", base_dir)
+        logger.info(_SEP)
         
         print(f"\n{'='*60}")
         print("Next Steps:")
@@ -772,11 +1548,41 @@ This route was automatically generated from OpenStreetMap data using osm_to_pbsu
         print(f"   See {readme_file} for detailed instructions")
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Convert OpenStreetMap data to Proton Bus Simulator route format',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+# Command line usage (after "usage: <prog> ") and the rest of the --help text
+_CLI_USAGE = """[-h] -m MAP_NAME -r ROUTE_NAME [-o OUTPUT]
+                      [--origin-lat ORIGIN_LAT] [--origin-lon ORIGIN_LON]
+                      [--lidar-file LIDAR_FILE] [--run-ai-automation]
+                      [--blender-path BLENDER_PATH]
+                      [--blender-timeout BLENDER_TIMEOUT] [--parse-cache]
+                      input_file"""
+
+_CLI_HELP = """Convert OpenStreetMap data to Proton Bus Simulator route format
+
+positional arguments:
+  input_file            Input OSM JSON file
+
+options:
+  -h, --help            show this help message and exit
+  -m MAP_NAME, --map-name MAP_NAME
+                        Name of the map (avoid special characters)
+  -r ROUTE_NAME, --route-name ROUTE_NAME
+                        Name of the route (avoid special characters)
+  -o OUTPUT, --output OUTPUT
+                        Output directory (default: output)
+  --origin-lat ORIGIN_LAT
+                        Origin latitude (default: first bus stop)
+  --origin-lon ORIGIN_LON
+                        Origin longitude (default: first bus stop)
+  --lidar-file LIDAR_FILE
+                        LiDAR HD elevation data file (.tif, .xyz, .las, .laz)
+  --run-ai-automation   Automatically run AI automation after conversion
+  --blender-path BLENDER_PATH
+                        Path to Blender executable for AI automation
+  --blender-timeout BLENDER_TIMEOUT
+                        Timeout for Blender execution in seconds (default: 600)
+  --parse-cache         Cache parsed OSM data in ~/.cache/osm_to_pbsu so re-runs
+                        on an unchanged input file skip parsing
+
 Examples:
   # Convert OSM JSON file to PBSU route
   python osm_to_pbsu.py route_data.json -m "My City" -r "Route 101"
@@ -792,41 +1598,110 @@ Examples:
 
 Note: Input file should be OSM JSON format (from Overpass API or exported from JOSM)
       LiDAR HD files can be obtained from French government data portal (geoservices.ign.fr)
-        """
+"""
+
+# Options taking a value: flag -> (destination, type)
+_CLI_OPTIONS = {
+    '-m': ('map_name', str), '--map-name': ('map_name', str),
+    '-r': ('route_name', str), '--route-name': ('route_name', str),
+    '-o': ('output', str), '--output': ('output', str),
+    '--origin-lat': ('origin_lat', float),
+    '--origin-lon': ('origin_lon', float),
+    '--lidar-file': ('lidar_file', str),
+    '--blender-path': ('blender_path', str),
+    '--blender-timeout': ('blender_timeout', int),
+}
+
+# Options that must be given
+_CLI_REQUIRED = ('map_name', 'route_name')
+
+
+def _cli_option_name(dest: str) -> str:
+    """All flags of an option joined with '/', as shown in error messages"""
+    return '/'.join(flag for flag, (option_dest, _) in _CLI_OPTIONS.items() if option_dest == dest)
+
+
+def _parse_args(argv: List[str]) -> SimpleNamespace:
+    """
+    Parse command line arguments
+    
+    A minimal stand-in for argparse with the same options, defaults, help
+    and error messages (errors exit with status 2). Options take their
+    value as the next argument or as --option=value.
+    """
+    prog = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'osm_to_pbsu.py'
+    
+    def error(message: str) -> None:
+        sys.stderr.write(f"usage: {prog} {_CLI_USAGE}\n{prog}: error: {message}\n")
+        sys.exit(2)
+    
+    args = SimpleNamespace(
+        input_file=None, map_name=None, route_name=None, output='output',
+        origin_lat=None, origin_lon=None, lidar_file=None,
+        run_ai_automation=False, blender_path='blender', blender_timeout=600,
+        parse_cache=False
     )
+    unrecognized = []
+    remaining = iter(argv)
+    for arg in remaining:
+        if arg in ('-h', '--help'):
+            sys.stdout.write(f"usage: {prog} {_CLI_USAGE}\n\n{_CLI_HELP}")
+            sys.exit(0)
+        elif arg == '--run-ai-automation':
+            args.run_ai_automation = True
+            continue
+        elif arg == '--parse-cache':
+            args.parse_cache = True
+            continue
+        elif arg in _CLI_OPTIONS:
+            flag = arg
+            value = next(remaining, None)
+        elif arg.startswith('--') and arg.partition('=')[0] in _CLI_OPTIONS:
+            flag, _, value = arg.partition('=')
+        elif arg.startswith('-') and arg != '-':
+            unrecognized.append(arg)
+            continue
+        elif args.input_file is None:
+            args.input_file = arg
+            continue
+        else:
+            unrecognized.append(arg)
+            continue
+        
+        dest, convert = _CLI_OPTIONS[flag]
+        if value is None:
+            error(f"argument {_cli_option_name(dest)}: expected one argument")
+        try:
+            setattr(args, dest, convert(value))
+        except ValueError:
+            error(f"argument {_cli_option_name(dest)}: invalid {convert.__name__} value: '{value}'")
     
-    parser.add_argument('input_file', help='Input OSM JSON file')
-    parser.add_argument('-m', '--map-name', required=True, 
-                       help='Name of the map (avoid special characters)')
-    parser.add_argument('-r', '--route-name', required=True,
-                       help='Name of the route (avoid special characters)')
-    parser.add_argument('-o', '--output', default='output',
-                       help='Output directory (default: output)')
-    parser.add_argument('--origin-lat', type=float,
-                       help='Origin latitude (default: first bus stop)')
-    parser.add_argument('--origin-lon', type=float,
-                       help='Origin longitude (default: first bus stop)')
-    parser.add_argument('--lidar-file', default=None,
-                       help='LiDAR HD elevation data file (.tif, .xyz, .las, .laz)')
-    parser.add_argument('--run-ai-automation', action='store_true',
-                       help='Automatically run AI automation after conversion')
-    parser.add_argument('--blender-path', default='blender',
-                       help='Path to Blender executable for AI automation')
-    parser.add_argument('--blender-timeout', type=int, default=600,
-                       help='Timeout for Blender execution in seconds (default: 600)')
-    
-    args = parser.parse_args()
+    missing = [_cli_option_name(dest) for dest in _CLI_REQUIRED if getattr(args, dest) is None]
+    if args.input_file is None:
+        missing.insert(0, 'input_file')
+    if missing:
+        error(f"the following arguments are required: {', '.join(missing)}")
+    if unrecognized:
+        error(f"unrecognized arguments: {' '.join(unrecognized)}")
+    return args
+
+
+def main():
+    args = _parse_args(sys.argv[1:])
     
     if not os.path.exists(args.input_file):
-        logger.error(f"Input file not found: {args.input_file}")
+        logger.error("Input file not found: %s", args.input_file)
         print(f"Error: Input file '{args.input_file}' not found")
         sys.exit(1)
     
     if args.lidar_file and not os.path.exists(args.lidar_file):
-        logger.warning(f"LiDAR file not found: {args.lidar_file}, will use default elevation")
+        logger.warning("LiDAR file not found: %s, will use default elevation", args.lidar_file)
         print(f"Warning: LiDAR file '{args.lidar_file}' not found, using default elevation")
     
-    converter = OSMToPBSUConverter(output_dir=args.output)
+    converter = OSMToPBSUConverter(
+        output_dir=args.output,
+        cache_dir=_default_cache_dir() if args.parse_cache else None
+    )
     
     try:
         converter.convert(
@@ -864,11 +1739,11 @@ Note: Input file should be OSM JSON format (from Overpass API or exported from J
                 logger.info("AI automation completed successfully")
                 
             except ImportError as e:
-                logger.error(f"Could not import automation modules: {e}")
+                logger.error("Could not import automation modules: %s", e)
                 print(f"Error: Could not import automation modules: {e}")
                 print("Make sure ai_automation.py and automate_post_conversion.py are in the same directory")
             except Exception as e:
-                logger.error(f"Error during AI automation: {e}")
+                logger.error("Error during AI automation: %s", e)
                 print(f"Error during AI automation: {e}")
                 import traceback
                 traceback.print_exc()
@@ -876,7 +1751,7 @@ Note: Input file should be OSM JSON format (from Overpass API or exported from J
                 print(f"  python ai_automation.py {map_dir} {args.route_name}")
         
     except Exception as e:
-        logger.error(f"Error during conversion: {e}")
+        logger.error("Error during conversion: %s", e)
         print(f"Error during conversion: {e}")
         import traceback
         traceback.print_exc()
@@ -10,18 +10,24 @@ Tests cover:
 - Error handling
 """
 
+import io
 import unittest
 import tempfile
 import os
 import json
-import shutil
+import math
 import sys
 from unittest.mock import patch, MagicMock
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from osm_to_pbsu import OSMToPBSUConverter
+
+def _temp_dir(test):
+    """Create a temporary directory that is removed when the test finishes"""
+    temp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(temp_dir.cleanup)
+    return temp_dir.name
 
 
 class TestOSMParsing(unittest.TestCase):
@@ -29,14 +35,11 @@ class TestOSMParsing(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
-        self.temp_dir = tempfile.mkdtemp()
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        self.temp_dir = _temp_dir(self)
         self.converter = OSMToPBSUConverter(output_dir=self.temp_dir)
         
-    def tearDown(self):
-        """Clean up test fixtures"""
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_parse_bus_stops(self):
         """Test parsing bus stops from OSM data"""
         osm_data = {
@@ -69,6 +72,34 @@ class TestOSMParsing(unittest.TestCase):
         self.assertEqual(len(self.converter.bus_stops), 2)
         self.assertEqual(self.converter.bus_stops[0]['name'], 'Test Stop 1')
         self.assertEqual(self.converter.bus_stops[1]['name'], 'Test Stop 2')
+
+    def test_parse_bus_stop_internal_name(self):
+        """Test that the internal name is the sanitized current stop name"""
+        from osm_to_pbsu import _internal_name
+
+        osm_data = {
+            'elements': [
+                {
+                    'type': 'node',
+                    'id': 1001,
+                    'lat': 48.8566,
+                    'lon': 2.3522,
+                    'tags': {
+                        'highway': 'bus_stop',
+                        'name': "Gare de l'Est - Château-Landon"
+                    }
+                }
+            ]
+        }
+
+        self.converter.parse_osm_json(osm_data)
+
+        stop = self.converter.bus_stops[0]
+        self.assertEqual(_internal_name(stop), 'Gare_de_lEst___Château_Landon')
+        
+        stop['name'] = 'New Name'
+        self.assertEqual(_internal_name(stop), 'New_Name')
+        self.assertEqual(self.converter.generate_entrypoints_list(), 'New_Name')
         
     def test_parse_roads(self):
         """Test parsing roads from OSM data"""
@@ -136,12 +167,165 @@ class TestOSMParsing(unittest.TestCase):
         self.assertEqual(len(self.converter.buildings), 1)
         self.assertEqual(self.converter.buildings[0]['height'], 10.5)  # 3 levels * 3.5m
 
+    def test_parse_way_before_nodes(self):
+        """Test that ways listed before their nodes are still resolved"""
+        elements = iter([
+            {
+                'type': 'way',
+                'id': 3001,
+                'nodes': [2001, 2002, 9999],  # 9999 is not in the extract
+                'tags': {'highway': 'residential'}
+            },
+            {'type': 'way', 'id': 3002, 'nodes': [2003, 2001], 'tags': {'highway': 'primary'}},
+            {'type': 'way', 'id': 3003, 'nodes': [2002, 2003], 'tags': {'highway': 'trunk'}},
+            {'type': 'node', 'id': 2003, 'lat': 48.8568, 'lon': 2.3524},
+            {'type': 'node', 'id': 2001, 'lat': 48.8566, 'lon': 2.3522},
+            {'type': 'node', 'id': 2002, 'lat': 48.8567, 'lon': 2.3523},
+        ])
+
+        self.converter.parse_osm_elements(elements)
+
+        route_ways = self.converter.route_ways
+        self.assertEqual([way['id'] for way in route_ways], [3001, 3002, 3003])
+        self.assertEqual(len(route_ways[0]['nodes']), 2)
+        self.assertEqual(route_ways[0]['nodes'][1]['lat'], 48.8567)
+        self.assertEqual([node['lat'] for node in route_ways[1]['nodes']], [48.8568, 48.8566])
+
+    def test_parse_nodes_without_coordinates(self):
+        """Test that nodes without lat/lon are skipped instead of aborting the parse"""
+        elements = iter([
+            {'type': 'way', 'id': 3001, 'nodes': [2001, 2002, 2003], 'tags': {'highway': 'primary'}},
+            {'type': 'node', 'id': 2001, 'lat': 48.8566, 'lon': 2.3522},
+            {'type': 'node', 'id': 2002},
+            {'type': 'node', 'id': 2003, 'lat': 48.8568, 'lon': 2.3524},
+            {'type': 'node', 'id': 1001, 'tags': {'highway': 'bus_stop', 'name': 'Nowhere'}},
+        ])
+
+        self.converter.parse_osm_elements(elements)
+
+        self.assertEqual(self.converter.bus_stops, [])
+        self.assertEqual([node['lat'] for node in self.converter.route_ways[0]['nodes']],
+                         [48.8566, 48.8568])
+
+    def test_parsed_ways_keep_element_order(self):
+        """Test that ways resolved out of order are still stored in element order"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        # Ways first, then nodes in a different order, like "out body; >; out skel qt;"
+        ways = [
+            {'type': 'way', 'id': 3001, 'nodes': [2005, 2006], 'tags': {'highway': 'primary'}},
+            {'type': 'way', 'id': 3002, 'nodes': [2001, 2002], 'tags': {'building': 'yes'}},
+            {'type': 'way', 'id': 3003, 'nodes': [2003, 2004], 'tags': {'highway': 'residential'}},
+            {'type': 'way', 'id': 3004, 'nodes': [2006, 2001], 'tags': {'building': 'house'}},
+            {'type': 'way', 'id': 3005, 'nodes': [2002, 2003],
+             'tags': {'highway': 'secondary', 'building': 'yes'}},
+        ]
+        nodes = [{'type': 'node', 'id': node_id, 'lat': 48.85 + node_id * 1e-6, 'lon': 2.35}
+                 for node_id in (2003, 2001, 2006, 2004, 2002, 2005)]
+        
+        # A list counts node references up front; an iterator is a plain stream
+        for elements in (ways + nodes, iter(ways + nodes)):
+            with self.subTest(streamed=not isinstance(elements, list)):
+                converter = OSMToPBSUConverter()
+                converter.parse_osm_elements(elements)
+                
+                self.assertEqual([way['id'] for way in converter.route_ways], [3001, 3003, 3005])
+                self.assertEqual([b['id'] for b in converter.buildings], [3002, 3004, 3005])
+    
+    def test_parse_osm_json_stream(self):
+        """Test that parsing from a file, loaded or streamed, matches parsing the data"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        osm_data = {
+            'elements': [
+                {'type': 'node', 'id': 1001, 'lat': 48.8566, 'lon': 2.3522,
+                 'tags': {'highway': 'bus_stop', 'name': 'Stream Stop'}},
+                {'type': 'node', 'id': 2001, 'lat': 48.8567, 'lon': 2.3523},
+                {'type': 'way', 'id': 3001, 'nodes': [1001, 2001],
+                 'tags': {'highway': 'primary'}}
+            ]
+        }
+        temp_dir = _temp_dir(self)
+        osm_file = os.path.join(temp_dir, 'stream.json')
+        with open(osm_file, 'w') as f:
+            json.dump(osm_data, f)
+
+        expected = OSMToPBSUConverter()
+        expected.parse_osm_json(osm_data)
+
+        # Small files are loaded whole; a zero threshold forces streaming
+        for min_size in (1 << 20, 0):
+            with self.subTest(min_size=min_size), patch('osm_to_pbsu._STREAM_MIN_SIZE', min_size):
+                converter = OSMToPBSUConverter()
+                converter.parse_osm_json_stream(osm_file)
+
+                self.assertEqual(converter.bus_stops, expected.bus_stops)
+                self.assertEqual(len(converter.route_ways), 1)
+                self.assertEqual(list(converter.route_ways[0]['nodes']),
+                                 list(expected.route_ways[0]['nodes']))
+
+    def test_node_table_keeps_only_referenced_nodes(self):
+        """Test that unreferenced nodes are not stored and used ones are released"""
+        elements = [
+            {'type': 'node', 'id': 2001, 'lat': 48.8566, 'lon': 2.3522},
+            {'type': 'node', 'id': 2002, 'lat': 48.8567, 'lon': 2.3523},
+            {'type': 'node', 'id': 2003, 'lat': 48.8568, 'lon': 2.3524},
+            {'type': 'way', 'id': 3001, 'nodes': [2001, 2002],
+             'tags': {'highway': 'primary'}},
+            {'type': 'way', 'id': 3002, 'nodes': [2002, 2003],
+             'tags': {'highway': 'footway'}},  # not collected
+        ]
+        stored = []
+        original_handle_node = self.converter._handle_node
+
+        def spy_handle_node(element):
+            original_handle_node(element)
+            stored.append(set(self.converter._node_index))
+
+        released = []
+        original_collect_way = self.converter._collect_way
+
+        def spy_collect_way(element, *args):
+            original_collect_way(element, *args)
+            released.append(set(self.converter._node_index))
+
+        self.converter._handle_node = spy_handle_node
+        self.converter._collect_way = spy_collect_way
+        self.converter.parse_osm_elements(elements)
+
+        self.assertEqual(stored[-1], {2001, 2002})  # 2003 only used by a footway
+        self.assertEqual(released, [set()])  # both nodes dropped after their last way
+        self.assertEqual(len(self.converter.route_ways), 1)
+        self.assertEqual(len(self.converter.route_ways[0]['nodes']), 2)
+
+    def test_way_nodes_are_packed_columns(self):
+        """Test that way geometry is packed but still reads like lat/lon dicts"""
+        osm_data = {
+            'elements': [
+                {'type': 'node', 'id': 2001, 'lat': 48.8566, 'lon': 2.3522},
+                {'type': 'node', 'id': 2002, 'lat': 48.8567, 'lon': 2.3523},
+                {'type': 'way', 'id': 3001, 'nodes': [2001, 2002],
+                 'tags': {'highway': 'primary'}}
+            ]
+        }
+
+        self.converter.parse_osm_json(osm_data)
+
+        nodes = self.converter.route_ways[0]['nodes']
+        self.assertEqual(list(nodes.lats), [48.8566, 48.8567])
+        self.assertEqual(list(nodes.lons), [2.3522, 2.3523])
+        self.assertEqual(list(nodes), [{'lat': 48.8566, 'lon': 2.3522},
+                                       {'lat': 48.8567, 'lon': 2.3523}])
+        self.assertEqual(nodes[::2], [{'lat': 48.8566, 'lon': 2.3522}])
+
 
 class TestBuildingHeightExtraction(unittest.TestCase):
     """Test building height extraction from OSM tags"""
     
     def setUp(self):
         """Set up test fixtures"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
         self.converter = OSMToPBSUConverter()
         
     def test_extract_height_from_tag(self):
@@ -150,6 +334,11 @@ class TestBuildingHeightExtraction(unittest.TestCase):
         height = self.converter._extract_building_height(tags)
         self.assertEqual(height, 15.0)
         
+    def test_extract_height_with_spaced_unit(self):
+        """Test that unit suffixes and surrounding spaces are ignored"""
+        self.assertEqual(self.converter._extract_building_height({'height': ' 12.5 M '}), 12.5)
+        self.assertEqual(self.converter._extract_building_height({'height': 'tall', 'building:height': '9 m'}), 9.0)
+        
     def test_extract_height_from_levels(self):
         """Test extracting height from building:levels tag"""
         tags = {'building:levels': '4'}
@@ -182,6 +371,8 @@ class TestCoordinateConversion(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
         self.converter = OSMToPBSUConverter()
         
     def test_lat_lon_to_unity_coords(self):
@@ -211,20 +402,87 @@ class TestCoordinateConversion(unittest.TestCase):
         self.assertAlmostEqual(y, 0.0, places=5)
         self.assertAlmostEqual(z, 0.0, places=5)
 
+    def test_east_offset_is_great_circle_distance(self):
+        """Test that X follows the haversine distance along the parallel"""
+        # One degree of longitude at the equator is R * pi / 180
+        x, _, z = self.converter.lat_lon_to_unity_coords(0.0, 1.0, 0.0, 0.0)
+        self.assertAlmostEqual(x, 6371000 * math.pi / 180, places=3)
+        self.assertAlmostEqual(z, 0.0, places=5)
+
+        # West of the origin is negative
+        x, _, _ = self.converter.lat_lon_to_unity_coords(0.0, -1.0, 0.0, 0.0)
+        self.assertLess(x, 0)
+
+    def test_project_stops_caches_batch(self):
+        """Test that bus stops are projected once and cached in stop order"""
+        self.converter.bus_stops = [
+            {'name': 'A', 'lat': 48.8566, 'lon': 2.3522, 'tags': {}},
+            {'name': 'B', 'lat': 48.8600, 'lon': 2.3600, 'tags': {}}
+        ]
+
+        coords = self.converter._project_stops(48.8566, 2.3522)
+
+        self.assertIs(coords, self.converter._stop_coords)
+        self.assertEqual(len(coords), 2)
+        self.assertAlmostEqual(coords[0][0], 0.0, places=5)
+        self.assertEqual(
+            coords[1],
+            self.converter.lat_lon_to_unity_coords(48.8600, 2.3600, 48.8566, 2.3522)
+        )
+
+    def test_projector_is_cached_per_origin(self):
+        """Test that scalar conversions reuse the projector for an origin"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        first = self.converter._make_projector(48.8566, 2.3522)
+        second = OSMToPBSUConverter()._make_projector(48.8566, 2.3522)
+        other = self.converter._make_projector(40.7128, -74.0060)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_lat_lon_to_unity_coords_batch(self):
+        """Test that the public batch conversion returns X, Y and Z columns"""
+        origin_lat, origin_lon = 48.8566, 2.3522
+        lats = [48.8567, 48.8566, 47.0]
+        lons = [2.3523, 2.3522, 3.0]
+
+        xs, ys, zs = self.converter.lat_lon_to_unity_coords_batch(lats, lons, origin_lat, origin_lon)
+
+        self.assertEqual(
+            list(zip(xs, ys, zs)),
+            [self.converter.lat_lon_to_unity_coords(lat, lon, origin_lat, origin_lon)
+             for lat, lon in zip(lats, lons)]
+        )
+        self.assertEqual(
+            self.converter.lat_lon_to_unity_coords_batch([], [], origin_lat, origin_lon),
+            ([], [], [])
+        )
+
+    def test_projector_matches_scalar_conversion(self):
+        """Test that the cached-origin projector matches lat_lon_to_unity_coords"""
+        origin_lat, origin_lon = 48.8566, 2.3522
+        proj = self.converter._make_projector(origin_lat, origin_lon)
+
+        for lat, lon in [(48.8567, 2.3523), (48.80, 2.40), (48.8566, 2.3522)]:
+            with self.subTest(lat=lat, lon=lon):
+                expected = self.converter.lat_lon_to_unity_coords(
+                    lat, lon, origin_lat, origin_lon
+                )
+                for got, want in zip(proj(lat, lon), expected):
+                    self.assertAlmostEqual(got, want, places=6)
+
 
 class TestFileGeneration(unittest.TestCase):
     """Test file generation functionality"""
     
     def setUp(self):
         """Set up test fixtures"""
-        self.temp_dir = tempfile.mkdtemp()
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        self.temp_dir = _temp_dir(self)
         self.converter = OSMToPBSUConverter(output_dir=self.temp_dir)
         
-    def tearDown(self):
-        """Clean up test fixtures"""
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_generate_map_txt(self):
         """Test generation of main map file"""
         content = self.converter.generate_map_txt("TestMap", "TestRoute")
@@ -233,6 +491,10 @@ class TestFileGeneration(unittest.TestCase):
         self.assertIn("baseDir=TestMap", content)
         self.assertIn("modelsDir=TestRoute", content)
         self.assertIn("mapModVersion=2", content)
+        self.assertEqual(content, (
+            "[map]\nbaseDir=TestMap\nmodelsDir=TestRoute\ntextures=textures\n"
+            "mapModVersion=2\npreview=preview.png\n"
+        ))
         
     def test_generate_entrypoints_list(self):
         """Test generation of entrypoints list"""
@@ -246,6 +508,112 @@ class TestFileGeneration(unittest.TestCase):
         self.assertIn("Stop_One", content)
         self.assertIn("Stop_Two", content)
         
+    def test_generate_entrypoints_txt_uses_precomputed_coords(self):
+        """Test that entrypoints.txt reuses pre-projected stop coordinates"""
+        self.converter.bus_stops = [
+            {'name': 'Stop One', 'lat': 48.0, 'lon': 2.0, 'tags': {}}
+        ]
+
+        content = self.converter.generate_entrypoints_txt(
+            48.0, 2.0, stop_coords=[(12.5, 0.0, -3.25)]
+        )
+
+        self.assertIn("posX=12.500000", content)
+        self.assertIn("posZ=-3.250000", content)
+
+    def test_write_stop_outputs_matches_individual_generators(self):
+        """Test that the fused pass renders the same files as the generators"""
+        self.converter.bus_stops = [
+            {'name': 'Stop One', 'lat': 48.0, 'lon': 2.0, 'tags': {}},
+            {'name': 'Stop Two', 'lat': 48.1, 'lon': 2.1, 'tags': {}}
+        ]
+        list_buf, entrypoints_buf, readme_buf = io.StringIO(), io.StringIO(), io.StringIO()
+
+        self.converter._write_stop_outputs(list_buf, entrypoints_buf, readme_buf, 48.0, 2.0)
+        list_txt = list_buf.getvalue()
+        entrypoints_txt = entrypoints_buf.getvalue()
+        readme_lines = readme_buf.getvalue()
+
+        self.assertEqual(list_txt, self.converter.generate_entrypoints_list())
+        self.assertEqual(entrypoints_txt, self.converter.generate_entrypoints_txt(48.0, 2.0))
+        self.assertEqual(self.converter._stop_coords, [])  # projected without caching
+        self.assertEqual(list_txt, "Stop_One\nStop_Two")
+        self.assertIn("[entrypoint_2]\nname=Stop_Two", entrypoints_txt)
+        self.assertIn("\n[entrypoint_2]", entrypoints_txt.split("rotZ=0\n", 1)[1])
+        self.assertIn("\n2. Stop Two - Position: (", readme_lines)
+
+    def test_write_json_file_without_orjson(self):
+        """Test that the json fallback writes the same document as orjson"""
+        from osm_to_pbsu import _write_json_file
+
+        data = {
+            'bus_stops': [{'name': 'Hôtel de Ville', 'x': 1.5, 'y': float('nan')}],
+            'elevations': {'48.85,2.35': {'elevation': float('inf')}},
+            'buildings': []
+        }
+        path = os.path.join(self.temp_dir, 'fallback.json')
+        
+        with patch.dict(sys.modules, {'orjson': None}):
+            _write_json_file(path, data)
+        with open(path, 'rb') as f:
+            fallback = f.read()
+        
+        self.assertIn('Hôtel de Ville'.encode('utf-8'), fallback)
+        self.assertEqual(json.loads(fallback.decode('utf-8')), {
+            'bus_stops': [{'name': 'Hôtel de Ville', 'x': 1.5, 'y': None}],
+            'elevations': {'48.85,2.35': {'elevation': None}},
+            'buildings': []
+        })
+        
+        try:
+            import orjson
+        except ImportError:
+            return
+        _write_json_file(path, data)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), fallback)
+
+    def test_internal_name_does_not_modify_stops(self):
+        """Test that generators derive internal names without writing them into stops"""
+        stop = {'name': 'Stop One', 'lat': 48.0, 'lon': 2.0, 'tags': {}}
+        self.converter.bus_stops = [stop]
+
+        self.assertEqual(self.converter.generate_entrypoints_list(), "Stop_One")
+        self.assertNotIn('internal_name', stop)
+
+        stop['name'] = 'Stop Renamed'
+        self.assertIn("prefix=Stop_Renamed\n", self.converter.generate_busstop_txt(stop, 1, 48.0, 2.0))
+
+    def test_internal_name_sanitization(self):
+        """Test that internal names keep only letters, digits and underscores"""
+        from osm_to_pbsu import _sanitize_name
+
+        self.assertEqual(_sanitize_name("St. Mary's - North"), "St_Marys___North")
+        self.assertEqual(_sanitize_name("Line 12/B (Terminus)"), "Line_12B_Terminus")
+        self.assertEqual(_sanitize_name("Hôtel de Ville"), "Hôtel_de_Ville")
+
+    def test_generate_entrypoints_txt_with_headings(self):
+        """Test that batch bearings feed the entrypoint rotY values"""
+        self.converter.bus_stops = [
+            {'name': 'Stop One', 'lat': 48.0, 'lon': 2.0, 'tags': {}},
+            {'name': 'Stop Two', 'lat': 48.0, 'lon': 2.1, 'tags': {}}
+        ]
+        points = [(s['lat'], s['lon']) for s in self.converter.bus_stops]
+
+        headings = self.converter._bearings(points, points[1:] + points[:1])
+
+        self.assertEqual(headings, [
+            self.converter.calculate_rotation_y(48.0, 2.0, 48.0, 2.1),
+            self.converter.calculate_rotation_y(48.0, 2.1, 48.0, 2.0)
+        ])
+        self.assertEqual(headings, [90.0, 270.0])
+
+        content = self.converter.generate_entrypoints_txt(48.0, 2.0, headings=headings)
+
+        self.assertIn("rotY=90\n", content)
+        self.assertIn("rotY=270\n", content)
+        self.assertIn("rotY=0\n", self.converter.generate_entrypoints_txt(48.0, 2.0))
+
     def test_generate_busstop_txt(self):
         """Test generation of bus stop configuration"""
         stop = {
@@ -261,6 +629,20 @@ class TestFileGeneration(unittest.TestCase):
         self.assertIn("name=Test Stop", content)
         self.assertIn("[from_3d]", content)
         self.assertIn("readFrom3D=1", content)
+        self.assertEqual(content, (
+            "[busstop]\nname=Test Stop\nside=right\nradius=1\npaxAmount=5\n\n"
+            "[from_3d]\nreadFrom3D=1\nprefix=Test_Stop\nrotY=0\n"
+        ))
+
+    def test_busstop_file_matches_generated_content(self):
+        """Test that the segment-based bus stop writer matches generate_busstop_txt"""
+        stop = {'name': 'Gare de l\'Est', 'lat': 48.8566, 'lon': 2.3522, 'tags': {}}
+        path = os.path.join(self.temp_dir, 'stop.txt')
+
+        self.converter._write_busstop_chunk([(path, stop)])
+
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.converter.generate_busstop_txt(stop, 1, 48.8566, 2.3522))
 
 
 class TestDirectoryStructure(unittest.TestCase):
@@ -268,14 +650,11 @@ class TestDirectoryStructure(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
-        self.temp_dir = tempfile.mkdtemp()
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        self.temp_dir = _temp_dir(self)
         self.converter = OSMToPBSUConverter(output_dir=self.temp_dir)
         
-    def tearDown(self):
-        """Clean up test fixtures"""
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_create_directory_structure(self):
         """Test creation of PBSU directory structure"""
         base_dir, tiles_dir, busstops_dir = self.converter.create_directory_structure(
@@ -294,6 +673,8 @@ class TestElevationData(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
         self.converter = OSMToPBSUConverter()
         
     def test_fetch_elevation_data_returns_zero(self):
@@ -306,6 +687,19 @@ class TestElevationData(unittest.TestCase):
         for elevation in elevations.values():
             self.assertEqual(elevation, 0.0)
             
+    def test_elevation_set_reads_like_dict(self):
+        """Test that elevations are packed per distinct location but read like a dict"""
+        locations = [(48.8566, 2.3522), (48.8567, 2.3523), (48.8566, 2.3522)]
+        
+        elevations = self.converter.fetch_elevation_data(locations)
+        
+        self.assertEqual(list(elevations.lats), [48.8566, 48.8567])
+        self.assertEqual(list(elevations.lons), [2.3522, 2.3523])
+        self.assertEqual(list(elevations.z), [0.0, 0.0])
+        self.assertEqual(dict(elevations), {locations[0]: 0.0, locations[1]: 0.0})
+        self.assertIn(locations[1], elevations)
+        self.assertNotIn((0.0, 0.0), elevations)
+            
     def test_load_lidar_elevation_nonexistent_file(self):
         """Test loading LiDAR data from non-existent file"""
         locations = [(48.8566, 2.3522)]
@@ -316,17 +710,106 @@ class TestElevationData(unittest.TestCase):
         self.assertEqual(len(elevations), 1)
         self.assertEqual(elevations[locations[0]], 0.0)
 
+    def test_load_lidar_elevation_xyz_nearest_point(self):
+        """Test that XYZ data gives each location the elevation of its nearest point"""
+        temp_dir = _temp_dir(self)
+        xyz_file = os.path.join(temp_dir, 'elevation.xyz')
+        with open(xyz_file, 'w') as f:
+            f.write("2.3520 48.8560 35.0\n")
+            f.write("not a point\n")
+            f.write("2.3530 48.8570 42.5\n")
+        locations = [(48.8561, 2.3521), (48.8569, 2.3529)]
+        
+        elevations = self.converter.load_lidar_elevation(xyz_file, locations)
+        
+        self.assertEqual(elevations, {locations[0]: 35.0, locations[1]: 42.5})
+
+    def test_load_lidar_elevation_geotiff_nodata(self):
+        """Test that GeoTIFF nodata and NaN samples fall back to 0.0"""
+        dataset = MagicMock()
+        dataset.crs.is_geographic = True
+        dataset.nodata = -99999.0
+        dataset.sample.return_value = iter([[35.0], [-99999.0], [float('nan')]])
+        rasterio = MagicMock()
+        rasterio.open.return_value.__enter__.return_value = dataset
+        locations = [(48.8561, 2.3521), (48.0, 2.0), (48.8569, 2.3529)]
+        
+        with patch.dict(sys.modules, {'rasterio': rasterio, 'rasterio.warp': MagicMock()}):
+            elevations = self.converter.load_lidar_elevation('tile.tif', locations,
+                                                             check_exists=False)
+        
+        self.assertEqual(elevations, {locations[0]: 35.0, locations[1]: 0.0, locations[2]: 0.0})
+
+    def test_nearest_elevations_without_scipy(self):
+        """Test that the grid fallback finds the same points as a full scan"""
+        from osm_to_pbsu import _nearest_elevations
+
+        xs = [2.35 + (i % 7) * 0.001 for i in range(50)]
+        ys = [48.85 + (i // 7) * 0.001 for i in range(50)]
+        zs = [float(i) for i in range(50)]
+        locations = [(48.8512, 2.3533), (48.8449, 2.3401), (48.9, 2.4), (48.85, 2.35)]
+        
+        def scan(lat, lon):
+            dists = [(x - lon)**2 + (y - lat)**2 for x, y in zip(xs, ys)]
+            return zs[dists.index(min(dists))]
+        
+        with patch.dict(sys.modules, {'scipy': None, 'scipy.spatial': None}):
+            nearest = _nearest_elevations(xs, ys, zs, locations)
+        
+        self.assertEqual(nearest, [scan(lat, lon) for lat, lon in locations])
+        self.assertEqual(_nearest_elevations([], [], [], locations), [0.0] * 4)
+
+    def test_nearest_elevations_without_scipy_caps_points(self):
+        """Test that the grid fallback indexes an even stride of a large cloud"""
+        from osm_to_pbsu import _nearest_elevations
+
+        xs = [float(i) for i in range(50)]
+        ys = [0.0] * 50
+        zs = [float(i) for i in range(50)]
+        locations = [(0.0, 3.0), (0.0, 48.0)]
+        
+        with patch.dict(sys.modules, {'scipy': None, 'scipy.spatial': None}), \
+                patch('osm_to_pbsu._GRID_MAX_POINTS', 10):
+            nearest = _nearest_elevations(xs, ys, zs, locations)
+        
+        # Every 5th point is kept: 0, 5, ..., 45
+        self.assertEqual(nearest, [5.0, 45.0])
+
+    def test_grid_nearest_outside_and_elongated_clouds(self):
+        """Test the grid fallback for locations off the cloud and for a flat, elongated cloud"""
+        from osm_to_pbsu import _grid_nearest
+
+        def scan(xs, ys, zs, lat, lon):
+            dists = [(x - lon)**2 + (y - lat)**2 for x, y in zip(xs, ys)]
+            return zs[dists.index(min(dists))]
+        
+        # Lambert-93 style coordinates queried with WGS84 positions, far off the cloud
+        xs = [652000.0 + (i % 20) * 5.0 for i in range(400)]
+        ys = [6862000.0 + (i // 20) * 5.0 for i in range(400)]
+        zs = [float(i) for i in range(400)]
+        locations = [(48.8566, 2.3522), (6862050.0, 651000.0), (6870000.0, 652050.0)]
+        self.assertEqual(_grid_nearest(xs, ys, zs, locations),
+                         [scan(xs, ys, zs, lat, lon) for lat, lon in locations])
+        
+        # 41 points spread 100 km along x but only 1e-6 across
+        xs = [i * 2500.0 for i in range(41)]
+        ys = [(i % 3) * 5e-7 for i in range(41)]
+        zs = [float(i) for i in range(41)]
+        locations = [(0.5, 50100.0), (0.0, -5.0), (-3.0, 1e6)]
+        self.assertEqual(_grid_nearest(xs, ys, zs, locations),
+                         [scan(xs, ys, zs, lat, lon) for lat, lon in locations])
+
 
 class TestIntegration(unittest.TestCase):
     """Integration tests for full conversion process"""
     
     def setUp(self):
         """Set up test fixtures"""
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = _temp_dir(self)
         self.test_osm_file = os.path.join(self.temp_dir, 'test_route.json')
         
         # Create test OSM data
-        osm_data = {
+        self.osm_data = {
             'version': 0.6,
             'elements': [
                 {
@@ -374,15 +857,12 @@ class TestIntegration(unittest.TestCase):
         }
         
         with open(self.test_osm_file, 'w') as f:
-            json.dump(osm_data, f)
+            json.dump(self.osm_data, f)
         
-    def tearDown(self):
-        """Clean up test fixtures"""
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_full_conversion(self):
-        """Test full conversion process"""
+        """Test full conversion from an OSM file"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
         converter = OSMToPBSUConverter(output_dir=self.temp_dir)
         
         converter.convert(
@@ -397,25 +877,33 @@ class TestIntegration(unittest.TestCase):
         map_file = os.path.join(self.temp_dir, 'TestMap.map.txt')
         self.assertTrue(os.path.exists(map_file))
         
-        base_dir = os.path.join(self.temp_dir, 'TestMap')
-        self.assertTrue(os.path.exists(base_dir))
-        
-        tiles_dir = os.path.join(base_dir, 'tiles', 'TestRoute')
-        self.assertTrue(os.path.exists(tiles_dir))
-        
-        # Check entrypoints files
-        entrypoints_file = os.path.join(tiles_dir, 'entrypoints.txt')
-        self.assertTrue(os.path.exists(entrypoints_file))
+        tiles_dir = os.path.join(self.temp_dir, 'TestMap', 'tiles', 'TestRoute')
+        self.assertTrue(os.path.exists(os.path.join(tiles_dir, 'entrypoints.txt')))
+        self.assertTrue(os.path.exists(os.path.join(tiles_dir, 'entrypoints_list.txt')))
+    
+    def test_convert_from_data(self):
+        """Test conversion from OSM data already in memory"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        converter = OSMToPBSUConverter(output_dir=self.temp_dir)
+        converter.convert_from_data(self.osm_data, 'TestMap', 'TestRoute',
+                                    origin_lat=48.8566, origin_lon=2.3522)
         
-        entrypoints_list_file = os.path.join(tiles_dir, 'entrypoints_list.txt')
-        self.assertTrue(os.path.exists(entrypoints_list_file))
+        self.assertEqual([stop['name'] for stop in converter.bus_stops],
+                         ['Central Station', 'Main Street'])
+        self.assertEqual(len(converter.route_ways), 1)
+        self.assertEqual(converter.buildings, [])
         
-        # Check geographic data file
-        geo_data_file = os.path.join(base_dir, 'geographic_data.json')
-        self.assertTrue(os.path.exists(geo_data_file))
+        # Check per-stop configuration files
+        base_dir = os.path.join(self.temp_dir, 'TestMap')
+        busstops_dir = os.path.join(base_dir, 'tiles', 'TestRoute', 'aipeople', 'busstops')
+        self.assertEqual(sorted(os.listdir(busstops_dir)),
+                         ['Central_Station.txt', 'Main_Street.txt'])
+        with open(os.path.join(busstops_dir, 'Main_Street.txt'), encoding='utf-8') as f:
+            self.assertIn("prefix=Main_Street", f.read())
         
         # Verify geographic data content
-        with open(geo_data_file, 'r') as f:
+        with open(os.path.join(base_dir, 'geographic_data.json'), 'r') as f:
             geo_data = json.load(f)
         
         self.assertEqual(len(geo_data['bus_stops']), 2)
@@ -424,8 +912,32 @@ class TestIntegration(unittest.TestCase):
         self.assertIn('elevations', geo_data)
         
         # Check README
-        readme_file = os.path.join(base_dir, 'README.md')
-        self.assertTrue(os.path.exists(readme_file))
+        with open(os.path.join(base_dir, 'README.md'), encoding='utf-8') as f:
+            readme = f.read()
+        self.assertIn("# PBSU Route: TestMap - TestRoute", readme)
+        self.assertIn("- Bus stops: 2", readme)
+    
+    def test_conversion_uses_parse_cache(self):
+        """Test that a re-run on an unchanged file loads parsed data from the cache"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        geo_data_file = os.path.join(self.temp_dir, 'TestMap', 'geographic_data.json')
+        
+        converter = OSMToPBSUConverter(output_dir=self.temp_dir, cache_dir=cache_dir)
+        converter.convert(self.test_osm_file, 'TestMap', 'TestRoute',
+                          origin_lat=48.8566, origin_lon=2.3522)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        with open(geo_data_file, 'rb') as f:
+            first_run = f.read()
+        
+        converter = OSMToPBSUConverter(output_dir=self.temp_dir, cache_dir=cache_dir)
+        with patch.object(converter, 'parse_osm_json_stream',
+                          side_effect=AssertionError("cache not used")):
+            converter.convert(self.test_osm_file, 'TestMap', 'TestRoute',
+                              origin_lat=48.8566, origin_lon=2.3522)
+        with open(geo_data_file, 'rb') as f:
+            self.assertEqual(f.read(), first_run)
 
 
 class TestErrorHandling(unittest.TestCase):
@@ -433,15 +945,12 @@ class TestErrorHandling(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
-        self.temp_dir = tempfile.mkdtemp()
+        self.temp_dir = _temp_dir(self)
         
-    def tearDown(self):
-        """Clean up test fixtures"""
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_missing_input_file(self):
         """Test handling of missing input file"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
         converter = OSMToPBSUConverter(output_dir=self.temp_dir)
         
         with self.assertRaises(FileNotFoundError):
@@ -453,6 +962,8 @@ class TestErrorHandling(unittest.TestCase):
     
     def test_invalid_json(self):
         """Test handling of invalid JSON"""
+        from osm_to_pbsu import OSMToPBSUConverter
+
         invalid_file = os.path.join(self.temp_dir, 'invalid.json')
         with open(invalid_file, 'w') as f:
             f.write('invalid json content {')
@@ -467,6 +978,56 @@ class TestErrorHandling(unittest.TestCase):
             )
 
 
+class TestCommandLine(unittest.TestCase):
+    """Test command line argument parsing"""
+    
+    def test_parse_args_defaults(self):
+        """Test that optional arguments get their defaults"""
+        from osm_to_pbsu import _parse_args
+
+        args = _parse_args(['route.json', '-m', 'My City', '-r', 'Route 101'])
+        
+        self.assertEqual(args.input_file, 'route.json')
+        self.assertEqual(args.map_name, 'My City')
+        self.assertEqual(args.route_name, 'Route 101')
+        self.assertEqual(args.output, 'output')
+        self.assertIsNone(args.origin_lat)
+        self.assertIsNone(args.lidar_file)
+        self.assertFalse(args.run_ai_automation)
+        self.assertEqual(args.blender_path, 'blender')
+        self.assertEqual(args.blender_timeout, 600)
+        self.assertFalse(args.parse_cache)
+    
+    def test_parse_args_values(self):
+        """Test typed option values in both --option value and --option=value form"""
+        from osm_to_pbsu import _parse_args
+
+        args = _parse_args([
+            '--map-name=Paris', 'route.json', '-r', '42', '--origin-lat', '48.85',
+            '--origin-lon', '-2.35', '--blender-timeout=900', '--run-ai-automation', '--parse-cache'
+        ])
+        
+        self.assertEqual(args.map_name, 'Paris')
+        self.assertEqual(args.origin_lat, 48.85)
+        self.assertEqual(args.origin_lon, -2.35)
+        self.assertEqual(args.blender_timeout, 900)
+        self.assertTrue(args.run_ai_automation)
+        self.assertTrue(args.parse_cache)
+    
+    def test_parse_args_errors(self):
+        """Test that missing, invalid and unknown arguments exit with status 2"""
+        from osm_to_pbsu import _parse_args
+
+        for argv in (['route.json', '-m', 'A'],
+                     ['route.json', '-m', 'A', '-r', 'B', '--origin-lat', 'north'],
+                     ['route.json', '-m', 'A', '-r', 'B', '--unknown'],
+                     ['route.json', '-m']):
+            with self.subTest(argv=argv), patch('sys.stderr'):
+                with self.assertRaises(SystemExit) as cm:
+                    _parse_args(argv)
+                self.assertEqual(cm.exception.code, 2)
+
+
 class TestAIAutomation(unittest.TestCase):
     """Test AI automation functionality"""
     
@@ -498,6 +1059,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestElevationData))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     suite.addTests(loader.loadTestsFromTestCase(TestErrorHandling))
+    suite.addTests(loader.loadTestsFromTestCase(TestCommandLine))
     suite.addTests(loader.loadTestsFromTestCase(TestAIAutomation))
     
     runner = unittest.TextTestRunner(verbosity=2)